@@ -1,127 +1,410 @@
 # --- INSTALL THESE FIRST ---
 # pip install flask librosa pydub numpy pandas scikit-learn joblib soundfile scipy noisereduce
 
-from flask import Flask, request, jsonify
+from flask import Flask, Request, request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
 from pydub import AudioSegment, silence
 import numpy as np
 import pandas as pd
-import librosa
-import joblib
 from collections import Counter
 import io
+import os
+import hmac
+import time
 import base64
+import shutil
+import resource
+import tempfile
 import threading
+import tracemalloc
+import uuid
 import soundfile as sf
 
 # === NEW: shared cleaning module ===
 # This is the single source of truth for audio cleaning. Training (ML_Train.py)
 # uses the same function — without that parity, accuracy drops silently.
-from audio_clean import clean_audio, clean_audio_to_wav_bytes, TARGET_SR
+from audio_clean import (
+    clean_audio, to_wav_bytes, audio_duration, AudioTooLongError, TARGET_SR
+)
+# Feature extraction lives next to the cleaning code for the same reason:
+# one implementation for training and inference. Works on float32 arrays.
+from features import (
+    extract_features, FEATURE_COLUMNS, FrameFeatureCache, window_bounds, HOP_LENGTH
+)
+# Versioned, memory-mapped model artifacts (see model_store.py for layout).
+from model_store import load_bundle, activate, current_version, pointer_mtime
+# Durable SQLite queue behind the async /jobs API.
+from job_queue import JobQueue
+# Cheap RMS / voiced-ratio / flatness gate in front of feature extraction.
+from clip_quality import score_clips, gate
+# Append-only log of results + pre-aggregated rollups behind /stats.
+from ledger import Ledger, day_of, MAX_BATCH_LEN
 
 # === SETTINGS ===
 CLIP_LENGTH_MS = 3000
 MIN_SILENCE_LEN = 500
 SILENCE_THRESH = -45
 
+# === CLIP WINDOWS ===
+# "split": back-to-back 3 s clips, each analysed on its own (what the model
+# is trained on). "sliding": windows of every length in WINDOW_LENGTHS_S,
+# one every WINDOW_HOP_S seconds, all read off a single frame-level pass
+# over the recording (features.FrameFeatureCache), so denser voting costs
+# less CPU than splitting the same windows one by one. Window starts are
+# snapped to the STFT hop (~23 ms), which keeps the cached features equal
+# to per-clip extraction.
+#
+# In "sliding" mode total/male/female_clips count windows, not 3 s clips;
+# the response and the ledger carry clip_mode so the two aren't mixed up.
+CLIP_MODE = os.environ.get("CLIP_MODE", "split")
+WINDOW_LENGTHS_S = [float(v) for v in os.environ.get("WINDOW_LENGTHS_S", "3").split(",")]
+WINDOW_HOP_S = float(os.environ.get("WINDOW_HOP_S", "1"))
+MIN_CLIP_S = 1.0
+
+if CLIP_MODE not in ("split", "sliding"):
+    raise ValueError(f"CLIP_MODE must be split or sliding, not {CLIP_MODE!r}")
+if CLIP_MODE == "sliding":
+    # Anything at or below MIN_CLIP_S would silently yield no windows.
+    if min(WINDOW_LENGTHS_S) <= MIN_CLIP_S or WINDOW_HOP_S <= 0:
+        raise ValueError(
+            f"WINDOW_LENGTHS_S must all be > {MIN_CLIP_S} s and WINDOW_HOP_S > 0")
+    # The model only saw 3 s clips; means over shorter windows are noisier
+    # than anything it was trained on.
+    if min(WINDOW_LENGTHS_S) < CLIP_LENGTH_MS / 1000:
+        print(f"⚠️ WINDOW_LENGTHS_S has windows shorter than the "
+              f"{CLIP_LENGTH_MS / 1000:g} s training clips: {WINDOW_LENGTHS_S}")
+
+# === CLIP QUALITY ===
+# Skip junk clips (padding silence, residual noise) before feature
+# extraction and weight the vote by clip quality. "0" scores every clip.
+QUALITY_GATE = os.environ.get("QUALITY_GATE", "1") == "1"
+
+# === UPLOAD LIMITS ===
+# Sized for 512 MB instances: a single request peaks at several times the
+# decoded length, so the duration cap is what really bounds memory. Both can
+# be overridden per deployment through environment variables.
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_MB", "25")) * 1024 * 1024
+MAX_DURATION_S = float(os.environ.get("MAX_DURATION_S", "600"))
+# Request bodies larger than this (or of unknown length) are parsed
+# straight into a temp file instead of RAM.
+SPILL_THRESHOLD_BYTES = int(os.environ.get("SPILL_THRESHOLD_MB", "2")) * 1024 * 1024
+# Debug only: also log tracemalloc's traced peak. It roughly doubles the
+# cost of the clean + feature loop, and its peak is process-wide (requests
+# and job workers reset each other's), so it stays off in production.
+TRACK_PEAK_MEMORY = os.environ.get("TRACK_PEAK_MEMORY", "0") == "1"
+
+# === MODEL RELOAD ===
+# Every worker polls models/CURRENT and hot-swaps when it changes (0 = off).
+MODEL_WATCH_INTERVAL_S = float(os.environ.get("MODEL_WATCH_INTERVAL_S", "10"))
+# Shared secret for POST /admin/reload. Unset = endpoint disabled.
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+# === ASYNC JOBS ===
+# Background threads per process draining the /jobs queue (0 = accept
+# jobs but don't process them here, e.g. a web-only instance).
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "1"))
+JOB_POLL_S = 1.0
+JOB_ERROR_BACKOFF_S = 5.0   # worker pause after a queue error (locked DB, full disk)
+# Finished / failed jobs (rows, input and cleaned audio) are deleted after
+# this long; GET /jobs/<id> answers 404 from then on.
+JOB_RETENTION_S = float(os.environ.get("JOB_RETENTION_H", "72")) * 3600
+JOB_SWEEP_INTERVAL_S = 600
+
+# === PREDICTION LEDGER ===
+# Every result is appended to ledger/predictions.sqlite3 (0 = don't).
+RECORD_PREDICTIONS = os.environ.get("RECORD_PREDICTIONS", "1") == "1"
+STATS_DEFAULT_DAYS = 30
+STATS_DEFAULT_BATCHES = 50
+
 # === LOAD MODEL & SCALER (WARM-UP) ===
 # IMPORTANT: filenames bumped to *_cleaned.pkl. Make sure to retrain
 # (run ML_Train.py) and upload the new .pkl files to your Render volume,
 # otherwise the SVM is making predictions on cleaned features it never
 # learned from.
-model = None
-scaler = None
+#
+# `active` is a ModelBundle(model, scaler, version). Reloads build a new
+# bundle and swap it in with one assignment; a request grabs `active` once
+# and keeps using that bundle, so a swap mid-request can't mix versions
+# and nothing is dropped.
+active = None
 server_ready = False
+_reload_lock = threading.Lock()
+_loaded_pointer_mtime = None
+
+
+def reload_model(version=None, make_current=False):
+    """Load a model version (default: CURRENT) and swap it in atomically.
+
+    With `make_current`, CURRENT is repointed to it as well, but only once
+    it has loaded: a broken artifact must never become what every other
+    worker and every restart tries to load.
+    """
+    global active, server_ready, _loaded_pointer_mtime
+    with _reload_lock:
+        mtime = pointer_mtime()
+        bundle = load_bundle(version)
+        if make_current:
+            activate(bundle.version)
+            mtime = pointer_mtime()
+        active = bundle
+        _loaded_pointer_mtime = mtime
+        server_ready = True
+    print(f"✅ Model {bundle.version} active")
+    print(f"📊 Model classes: {bundle.model.classes_}")
+    return bundle
+
+
+def watch_model():
+    """Poll models/CURRENT and reload when it's repointed."""
+    while True:
+        time.sleep(MODEL_WATCH_INTERVAL_S)
+        if pointer_mtime() == _loaded_pointer_mtime:
+            continue
+        try:
+            print(f"🔁 Model pointer changed → {current_version()}")
+            reload_model()
+        except Exception as e:
+            # Keep serving the old model; try again on the next tick.
+            print(f"❌ Model reload failed: {e}")
 
 
 def warm_up():
-    global model, scaler, server_ready
     print("🔄 Warming up server...")
     try:
-        model = joblib.load("duckling_svm_rbf_cleaned.pkl")
-        scaler = joblib.load("duckling_scaler_cleaned.pkl")
-        server_ready = True
+        reload_model()
         print("✅ Server ready!")
-        print(f"📊 Model classes: {model.classes_}")
     except Exception as e:
         print(f"❌ Error loading model: {e}")
-        server_ready = False
+    if MODEL_WATCH_INTERVAL_S > 0:
+        threading.Thread(target=watch_model, daemon=True).start()
+    for _ in range(JOB_WORKERS):
+        threading.Thread(target=job_worker, daemon=True).start()
 
 
-# Start warm-up in a separate thread so Render responds immediately
-threading.Thread(target=warm_up).start()
+# === UPLOAD HANDLING ===
+class UploadTooLargeError(ValueError):
+    """Upload exceeded MAX_UPLOAD_BYTES."""
 
 
-# === FEATURE EXTRACTION ===
-# Operates on already-cleaned WAV bytes (split_audio passes cleaned clips).
-# We still call librosa.load here to pick up the bytes, but no second
-# cleaning pass — the data was cleaned upstream once for the whole recording.
-def extract_features(audio_bytes):
-    """Extract audio features for model prediction (input: cleaned WAV bytes)."""
-    try:
-        y, sr = librosa.load(io.BytesIO(audio_bytes), sr=None)
-        # NOTE: removed librosa.util.normalize(y) — clean_audio() already
-        # peak-normalized the parent recording. Re-normalizing each clip
-        # would erase loudness differences between clips.
-
-        mfccs = np.mean(librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13).T, axis=0)
-        spectral_centroid = np.mean(librosa.feature.spectral_centroid(y=y, sr=sr))
-        spectral_rolloff = np.mean(librosa.feature.spectral_rolloff(y=y, sr=sr))
-        zero_crossing_rate = np.mean(librosa.feature.zero_crossing_rate(y))
-        pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-        pitch = np.mean(pitches[pitches > 0]) if np.any(pitches > 0) else 0
-
-        return np.hstack([mfccs, spectral_centroid, spectral_rolloff, zero_crossing_rate, pitch])
-    except Exception as e:
-        print(f"❌ Feature extraction error: {e}")
-        raise
+class UploadRequest(Request):
+    """Request whose uploaded files are written exactly once.
 
+    Werkzeug parses the whole multipart body the first time request.files
+    is touched, into whatever _get_file_stream returns. Small bodies go to
+    a BytesIO; anything past SPILL_THRESHOLD_BYTES, or of unknown length
+    (chunked), goes straight to a named temp file that clean_audio can
+    open by path. read_upload then hands that buffer or path on as is.
+    The body size itself is capped by MAX_CONTENT_LENGTH while parsing.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type,
+                         filename=None, content_length=None):
+        if total_content_length is not None and total_content_length <= SPILL_THRESHOLD_BYTES:
+            return io.BytesIO()
+        # Keep the original extension so audioread can sniff the format.
+        suffix = os.path.splitext(filename or "")[1]
+        spill = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+        self.__dict__.setdefault("upload_spills", []).append(spill)
+        return spill
 
-# === CLEAN + SPLIT ===
-def clean_and_split(file_bytes):
-    """Run the full cleaning pipeline, then split into clips.
+
+def read_upload(file_storage):
+    """The parsed upload as something clean_audio accepts, without copying.
 
     Returns
     -------
-    clips : list[bytes]    — WAV-encoded 3-second clips, already cleaned.
-    cleaned_wav : bytes    — full cleaned recording, WAV-encoded.
-                              Sent back to the client so the user can hear it.
+    source : bytes | str   — raw bytes for small uploads, temp file path
+                              for large ones. Both are accepted by clean_audio.
+    size : int             — number of bytes received.
+
+    The caller owns the temp file and must delete it (see discard_upload);
+    discard_spills removes it at the end of the request otherwise.
     """
+    stream = file_storage.stream
+    if isinstance(stream, io.BytesIO):
+        source = stream.getvalue()
+        size = len(source)
+    else:
+        stream.flush()
+        source = stream.name
+        size = os.fstat(stream.fileno()).st_size
+    if size > MAX_UPLOAD_BYTES:
+        raise UploadTooLargeError(
+            f"Upload exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit"
+        )
+    return source, size
+
+
+def discard_upload(source):
+    """Remove the temp file created by read_upload, if any."""
+    if isinstance(source, str):
+        try:
+            os.remove(source)
+        except OSError:
+            pass
+
+
+# === MEMORY ACCOUNTING ===
+if TRACK_PEAK_MEMORY:
+    tracemalloc.start()
+
+
+def _max_rss_mb():
+    """Process high-water RSS in MB (ru_maxrss is KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _rss_mb():
+    """Current resident set size in MB (Linux), falling back to max RSS."""
     try:
-        # 1. CLEAN. clean_audio_to_wav_bytes accepts raw bytes and returns
-        # cleaned WAV bytes + sample rate. Internally: HPF + LPF + spectral
-        # gate + peak-normalize + silence-trim.
-        print("🧼 Cleaning audio with duckling-tuned DSP pipeline...")
-        cleaned_wav, sr = clean_audio_to_wav_bytes(file_bytes)
-        print(f"✅ Cleaned ({len(cleaned_wav)} bytes @ {sr}Hz)")
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return _max_rss_mb()
+
+
+def start_memory_probe():
+    """Snapshot RSS + high-water RSS at the start of a request."""
+    if TRACK_PEAK_MEMORY:
+        tracemalloc.reset_peak()
+    return _rss_mb(), _max_rss_mb()
+
+
+def report_memory(label, probe):
+    """Log RSS and high-water growth since `probe`, and return them.
+
+    max_rss_delta_mb is how far this request pushed the process's peak
+    (0 if it stayed under an earlier peak). Both are cheap reads.
+    """
+    rss, max_rss = _rss_mb(), _max_rss_mb()
+    stats = {
+        "rss_mb": round(rss, 1),
+        "rss_delta_mb": round(rss - probe[0], 1),
+        "max_rss_mb": round(max_rss, 1),
+        "max_rss_delta_mb": round(max_rss - probe[1], 1),
+    }
+    if TRACK_PEAK_MEMORY:
+        _, peak = tracemalloc.get_traced_memory()
+        stats["peak_traced_mb"] = round(peak / (1024 * 1024), 1)
+    print(f"📈 Memory [{label}]: {stats}")
+    return stats
+
+
+# === STAGE TIMING ===
+class StageTimer:
+    """Wall time per pipeline stage, reported in a Server-Timing header.
 
-        # 2. Load cleaned WAV into pydub for silence-aware splitting.
-        audio = AudioSegment.from_file(io.BytesIO(cleaned_wav))
-        chunks = silence.split_on_silence(
+    `lap(stage)` charges the time since the previous lap to `stage`;
+    repeated stages (per-clip features/svm) accumulate.
+    """
+
+    def __init__(self):
+        self.ms = {}
+        self._last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.ms[stage] = self.ms.get(stage, 0.0) + (now - self._last) * 1000
+        self._last = now
+
+    def header(self):
+        return ", ".join(f"{k};dur={v:.1f}" for k, v in self.ms.items())
+
+
+# === CLEAN + SPLIT ===
+def split_ranges_ms(audio):
+    """[start, end] ms ranges that silence.split_on_silence would cut.
+
+    Same detection, padding (keep_silence=100) and overlap handling as
+    split_on_silence, but returns the ranges instead of copying segments.
+    """
+    keep_silence = 100
+    ranges = [
+        [start - keep_silence, end + keep_silence]
+        for start, end in silence.detect_nonsilent(
             audio,
             min_silence_len=MIN_SILENCE_LEN,
             silence_thresh=SILENCE_THRESH
         )
+    ]
+    for prev, nxt in zip(ranges, ranges[1:]):
+        if nxt[0] < prev[1]:
+            prev[1] = (prev[1] + nxt[0]) // 2
+            nxt[0] = prev[1]
+    return [(max(start, 0), min(end, len(audio))) for start, end in ranges]
 
-        combined = AudioSegment.empty()
-        for c in chunks:
-            combined += c + AudioSegment.silent(duration=100)
-
-        # 3. Cut into fixed 3-second clips.
-        clips = []
-        for start in range(0, len(combined), CLIP_LENGTH_MS):
-            clip = combined[start:start + CLIP_LENGTH_MS]
-            if len(clip) > 1000:
-                buf = io.BytesIO()
-                clip.export(buf, format="wav")
-                clips.append(buf.getvalue())
-
-        print(f"🎵 Generated {len(clips)} clips from cleaned audio")
-        return clips, cleaned_wav
+
+def clean_and_split(source):
+    """Run the full cleaning pipeline, then split into clips.
+
+    Parameters
+    ----------
+    source : bytes | str   — raw upload bytes, or path to a spilled upload.
+
+    Returns
+    -------
+    signal : np.ndarray      — cleaned float32 audio with long silences cut
+                                out; the clips are ranges of it.
+    bounds : list[tuple]     — [start, end) sample range of each clip.
+    sr : int                 — sample rate of the clips.
+    cleaned_wav : bytes      — full cleaned recording, WAV-encoded.
+                                Sent back to the client so the user can hear it.
+    """
+    try:
+        # 1. CLEAN. clean_audio accepts raw bytes or a path and returns a
+        # float32 array. Internally: HPF + LPF + spectral gate +
+        # peak-normalize + silence-trim.
+        print("🧼 Cleaning audio with duckling-tuned DSP pipeline...")
+        y, sr = clean_audio(source, max_duration_s=MAX_DURATION_S)
+        cleaned_wav = to_wav_bytes(y, sr)
+        print(f"✅ Cleaned ({len(cleaned_wav)} bytes @ {sr}Hz)")
+
+        signal, bounds = split_clips(y, sr, cleaned_wav)
+        return signal, bounds, sr, cleaned_wav
     except Exception as e:
         print(f"❌ Clean+split error: {e}")
         raise
 
 
+def split_clips(y, sr, cleaned_wav):
+    """Silence-aware split of a cleaned signal into clips (see CLIP_MODE).
+
+    `cleaned_wav` is the WAV encoding of `y`; pydub uses it to find the
+    split points. Returns the concatenated non-silent signal and the
+    [start, end) sample range of every clip in it.
+    """
+    # 2. pydub finds the silence-aware split points; the samples
+    # themselves are cut from the float32 array, so features never see
+    # a 16-bit WAV round-trip (training doesn't either).
+    audio = AudioSegment.from_wav(io.BytesIO(cleaned_wav))
+    ranges = split_ranges_ms(audio)
+    del audio
+
+    def ms(t):
+        return t * sr // 1000
+
+    gap = np.zeros(ms(100), dtype=y.dtype)
+    pieces = []
+    for start, end in ranges:
+        pieces.extend([y[ms(start):ms(end)], gap])
+    combined = np.concatenate(pieces) if pieces else y[:0]
+    del pieces
+
+    # 3. Cut into fixed 3-second clips, or sliding windows.
+    if CLIP_MODE == "sliding":
+        bounds = window_bounds(len(combined), sr, WINDOW_LENGTHS_S, WINDOW_HOP_S, MIN_CLIP_S,
+                               align=HOP_LENGTH)
+    else:
+        clip_s = CLIP_LENGTH_MS / 1000
+        bounds = window_bounds(len(combined), sr, [clip_s], clip_s, MIN_CLIP_S)
+
+    print(f"🎵 Generated {len(bounds)} clips from cleaned audio ({CLIP_MODE})")
+    return combined, bounds
+
+
 # === NORMALIZE PREDICTION TO TITLE CASE ===
 def normalize_prediction(pred):
     pred_lower = str(pred).lower().strip()
@@ -133,8 +416,373 @@ def normalize_prediction(pred):
         return "Unknown"
 
 
+# === CLASSIFY ===
+def classify_features(bundle, features, timer=None):
+    """Scaler → SVM for a (n_clips, 17) feature matrix.
+
+    Returns [(prediction, confidence %)] in row order.
+    """
+    # Column layout must match ML_Train.py exactly.
+    features_df = pd.DataFrame(features, columns=FEATURE_COLUMNS)
+    features_scaled = bundle.scaler.transform(features_df)
+
+    probs = bundle.model.predict_proba(features_scaled)
+    if timer:
+        timer.lap("svm")
+    return [
+        (normalize_prediction(bundle.model.classes_[np.argmax(prob)]), float(max(prob) * 100))
+        for prob in probs
+    ]
+
+
+def classify_clip(bundle, clip, sr, timer=None):
+    """Features → scaler → SVM for one clip. Returns (prediction, confidence %)."""
+    features = extract_features(clip, sr).reshape(1, -1)
+    if timer:
+        timer.lap("features")
+    return classify_features(bundle, features, timer)[0]
+
+
+def classify_clips(bundle, signal, bounds, sr, timer=None, done=None, on_clip=None):
+    """Quality gate → features → SVM for every clip; returns clip_results.
+
+    "split" mode analyses each clip on its own, exactly like training.
+    "sliding" mode builds one FrameFeatureCache over `signal`, reads every
+    window's features off it and scores them in a single SVM call.
+
+    `done` maps clip index → (prediction, confidence) already known (job
+    checkpoints); `on_clip(idx, prediction, confidence)` is called for each
+    clip classified here.
+    """
+    done = done or {}
+    clips = [signal[start:end] for start, end in bounds]
+    qualities = clip_qualities(clips, sr)
+    if timer:
+        timer.lap("quality")
+
+    todo = [idx for idx, q in enumerate(qualities, 1)
+            if (q is None or q.keep) and idx not in done]
+    scored = dict(done)
+    if CLIP_MODE == "sliding":
+        if todo:
+            cache = FrameFeatureCache(signal, sr)
+            features = cache.window_features([bounds[idx - 1] for idx in todo])
+            if timer:
+                timer.lap("features")
+            scored.update(zip(todo, classify_features(bundle, features, timer)))
+    else:
+        for idx in todo:
+            try:
+                scored[idx] = classify_clip(bundle, clips[idx - 1], sr, timer)
+            except Exception as e:
+                print(f"⚠️ Error processing clip {idx}: {e}")
+                continue
+            if on_clip:
+                on_clip(idx, *scored[idx])
+
+    clip_results = []
+    for idx, ((start, end), quality) in enumerate(zip(bounds, qualities), 1):
+        if quality is not None and not quality.keep:
+            clip_results.append(clip_result(idx, None, 0.0, quality))
+        elif idx in scored:
+            result = clip_result(idx, *scored[idx], quality)
+            if CLIP_MODE == "sliding":
+                result["start_s"] = round(start / sr, 2)
+                result["end_s"] = round(end / sr, 2)
+            clip_results.append(result)
+    return clip_results
+
+
+def clip_qualities(clips, sr):
+    """Per-clip quality verdicts, or None per clip when the gate is off."""
+    if not QUALITY_GATE:
+        return [None] * len(clips)
+    return gate(score_clips(clips, sr))
+
+
+def clip_result(idx, pred, conf, quality=None):
+    """One prediction_summary entry; skipped clips carry the gate's reason."""
+    if quality is not None and not quality.keep:
+        return {
+            "clip": f"clip_{idx}",
+            "prediction": "Skipped",
+            "confidence": 0.0,
+            "skipped": True,
+            "reason": quality.reason,
+        }
+    result = {
+        "clip": f"clip_{idx}",
+        "prediction": pred,
+        "confidence": round(conf, 2)
+    }
+    if quality is not None:
+        result["weight"] = round(quality.weight, 3)
+    return result
+
+
+def scored_results(clip_results):
+    return [r for r in clip_results if not r.get("skipped")]
+
+
+def build_summary(clip_results, total_clips):
+    """Quality-weighted majority vote + counts over per-clip results.
+
+    Skipped clips stay in prediction_summary but don't vote and don't
+    count towards male/female clips or the average confidence.
+    """
+    scored = scored_results(clip_results)
+    summary_counter = Counter(r["prediction"] for r in scored)
+    votes = Counter()
+    for r in scored:
+        votes[r["prediction"]] += r.get("weight", 1.0)
+    majority_pred = max(votes, key=votes.get)
+    avg_conf = float(np.mean([r["confidence"] for r in scored]))
+    return {
+        "final_prediction": majority_pred,
+        "average_confidence": round(avg_conf, 2),
+        "total_clips": int(total_clips),
+        "male_clips": int(summary_counter.get("Male", 0)),
+        "female_clips": int(summary_counter.get("Female", 0)),
+        "skipped_clips": len(clip_results) - len(scored),
+        "clip_mode": CLIP_MODE,
+        "prediction_summary": clip_results,
+    }
+
+
+def check_duration(source):
+    """Reject over-long recordings from the header, before decoding.
+
+    If the header can't be read, clean_audio enforces the same limit
+    while decoding.
+    """
+    try:
+        duration = audio_duration(source)
+    except Exception:
+        duration = None
+    if duration is not None and duration > MAX_DURATION_S:
+        raise AudioTooLongError(f"Audio longer than {MAX_DURATION_S:g}s limit")
+
+
+# === PREDICTION LEDGER ===
+ledger = Ledger()
+
+
+def read_batch(form):
+    """Optional `batch` form field (e.g. a hatch or flock id)."""
+    batch = (form.get("batch") or "").strip()
+    if len(batch) > MAX_BATCH_LEN:
+        raise ValueError(f"batch must be at most {MAX_BATCH_LEN} characters")
+    return batch or None
+
+
+def record_prediction(request_id, summary, model_version, source, batch=None):
+    """Append a result to the ledger. Never fails the request."""
+    if not RECORD_PREDICTIONS:
+        return
+    try:
+        ledger.record(request_id, summary, model_version, source=source, batch=batch)
+    except Exception as e:
+        print(f"⚠️ Ledger write failed for {request_id}: {e}")
+
+
+# === ASYNC JOBS ===
+job_queue = JobQueue()
+
+
+_sweep_lock = threading.Lock()
+_last_sweep = 0.0
+
+
+class LeaseLostError(RuntimeError):
+    """Our lease on a job expired and another worker reclaimed it."""
+
+
+def _cleaned_path(job_id):
+    return os.path.join(job_queue.job_dir, f"{job_id}_cleaned.wav")
+
+
+def _keep_lease(job):
+    if not job_queue.heartbeat(job.id, job.lease_token):
+        raise LeaseLostError(f"Lease on job {job.id} lost")
+
+
+def _shrink_cleaned(job_id):
+    """After a job is done the float checkpoint is only served back to the
+    client, so rewrite it as 16-bit PCM (half the disk)."""
+    path = _cleaned_path(job_id)
+    y, sr = sf.read(path, dtype="float32")
+    tmp = path + ".tmp"
+    sf.write(tmp, y, sr, format="WAV", subtype="PCM_16")
+    os.replace(tmp, path)
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def sweep_jobs():
+    """Delete jobs past JOB_RETENTION_S, their files, and orphaned files
+    (uploads whose enqueue never happened). Runs at most every
+    JOB_SWEEP_INTERVAL_S per process; safe to race across processes."""
+    global _last_sweep
+    with _sweep_lock:
+        if time.time() - _last_sweep < JOB_SWEEP_INTERVAL_S:
+            return
+        _last_sweep = time.time()
+
+    purged = job_queue.purge(JOB_RETENTION_S)
+    for job in purged:
+        _remove_quietly(job.input_path)
+        _remove_quietly(_cleaned_path(job.id))
+
+    known = job_queue.known_ids()
+    cutoff = time.time() - JOB_RETENTION_S
+    for entry in os.scandir(job_queue.job_dir):
+        job_id = entry.name.split("_")[0].split(".")[0]
+        if (entry.is_file() and not entry.name.startswith("jobs.sqlite3")
+                and job_id not in known and entry.stat().st_mtime < cutoff):
+            _remove_quietly(entry.path)
+    if purged:
+        print(f"🧹 Purged {len(purged)} old jobs")
+
+
+def process_job(job):
+    """Run one queued recording to completion, reusing any checkpoints.
+
+    Two checkpoints make retries cheap: the cleaned signal (float WAV, so
+    a retry splits into exactly the same clips) and every clip already
+    classified with the current model version. Sliding mode scores the
+    whole recording in one batch, so it only uses the first.
+    """
+    bundle = active
+    cleaned_path = _cleaned_path(job.id)
+
+    if os.path.exists(cleaned_path):
+        y, sr = sf.read(cleaned_path, dtype="float32")
+        print(f"♻️ Job {job.id}: reusing cleaned audio")
+    else:
+        y, sr = clean_audio(job.input_path, max_duration_s=MAX_DURATION_S)
+        tmp = cleaned_path + ".tmp"
+        sf.write(tmp, y, sr, format="WAV", subtype="FLOAT")
+        os.replace(tmp, cleaned_path)
+    _keep_lease(job)
+
+    signal, bounds = split_clips(y, sr, to_wav_bytes(y, sr))
+    done, on_clip = None, None
+    if CLIP_MODE != "sliding":
+        done = job_queue.checkpoints(job.id, bundle.version)
+        if done:
+            print(f"♻️ Job {job.id}: {len(done)}/{len(bounds)} clips from checkpoint")
+
+        def on_clip(idx, pred, conf):
+            if not job_queue.checkpoint(job.id, job.lease_token, idx, bundle.version, pred, conf):
+                raise LeaseLostError(f"Lease on job {job.id} lost")
+
+    clip_results = classify_clips(bundle, signal, bounds, sr, done=done, on_clip=on_clip)
+
+    if not scored_results(clip_results):
+        raise ValueError("Audio too short or silent - no valid clips generated")
+
+    result = build_summary(clip_results, len(bounds))
+    result["model_version"] = bundle.version
+    result["cleaned_audio"] = {
+        "format": "wav",
+        "sample_rate": TARGET_SR,
+        "url": f"/jobs/{job.id}/audio",
+    }
+    return result
+
+
+def run_one_job():
+    """Claim and run one job. Returns False if there was nothing to do."""
+    job = job_queue.claim()
+    if job is None:
+        return False
+
+    print(f"🧵 Job {job.id}: attempt {job.attempts}")
+    try:
+        result = process_job(job)
+    except LeaseLostError as e:
+        # Whoever reclaimed the job owns it now; leave its state alone.
+        print(f"⚠️ {e}")
+        return True
+    except AudioTooLongError as e:
+        job_queue.fail(job.id, job.lease_token, str(e), retry=False)
+        print(f"❌ Job {job.id}: {e}")
+        return True
+    except Exception as e:
+        status = job_queue.fail(job.id, job.lease_token, str(e))
+        print(f"❌ Job {job.id}: {e} → {status or 'lease lost'}")
+        return True
+
+    # Ledger first: the insert is idempotent on the job id, so a crash
+    # between the two just re-records (a no-op) when the job is reclaimed,
+    # whereas complete-then-record could lose the row for good.
+    record_prediction(job.id, result, result["model_version"], "job", job.batch)
+    if not job_queue.complete(job.id, job.lease_token, result):
+        print(f"⚠️ Job {job.id}: lease lost before completion, result dropped")
+        return True
+    discard_upload(job.input_path)
+    _shrink_cleaned(job.id)
+    print(f"✅ Job {job.id}: {result['final_prediction']} "
+          f"({result['average_confidence']}%)")
+    return True
+
+
+def job_worker():
+    """Claim → process → complete, forever. Errors requeue with backoff.
+
+    Nothing may escape this loop: a queue error (database locked past the
+    timeout, disk full) is logged and retried after a pause, otherwise the
+    daemon thread would die silently and this process stop taking jobs.
+    """
+    while True:
+        try:
+            if active is None or not run_one_job():
+                sweep_jobs()
+                time.sleep(JOB_POLL_S)
+        except Exception as e:
+            print(f"❌ Job worker error: {e}")
+            time.sleep(JOB_ERROR_BACKOFF_S)
+
+
+# Start warm-up in a separate thread so Render responds immediately.
+# Started only once job_worker exists: warm_up launches the job workers.
+threading.Thread(target=warm_up).start()
+
+
+def job_json(job):
+    return {
+        "id": job.id,
+        "job_status": job.status,
+        "attempts": job.attempts,
+        "batch": job.batch,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+        "error": job.error,
+        "result": job.result,
+    }
+
+
 # === FLASK APP ===
 app = Flask(__name__)
+app.request_class = UploadRequest
+# Hard cap on the request body (file + form overhead), enforced while it is
+# parsed, chunked uploads included. read_upload checks MAX_UPLOAD_BYTES on
+# the file itself.
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES + 64 * 1024
+
+
+@app.teardown_request
+def discard_spills(exc):
+    """Close and delete the request's upload temp files (no-op for ones a
+    handler already removed or moved into the job queue)."""
+    for spill in request.__dict__.get("upload_spills", []):
+        spill.close()
+        discard_upload(spill.name)
 
 
 @app.route("/predict", methods=["POST"])
@@ -146,108 +794,121 @@ def predict():
             "message": "Server warming up, try again in a few seconds"
         }), 503
 
-    if "file" not in request.files:
-        return jsonify({
-            "status": "error",
-            "message": "No file uploaded"
-        }), 400
+    # One bundle for the whole request, even if a reload lands meanwhile.
+    bundle = active
 
+    # Before request.files: that is where the body gets parsed.
+    memory_probe = start_memory_probe()
+    timer = StageTimer()
+    source = None
     try:
-        file_bytes = request.files["file"].read()
-
-        if len(file_bytes) == 0:
+        if "file" not in request.files:
             return jsonify({
                 "status": "error",
-                "message": "Empty file uploaded"
+                "message": "No file uploaded"
             }), 400
 
-        print(f"📁 Received file: {len(file_bytes)} bytes")
-
-        # Clean + split (cleaning happens once, here)
-        clips, cleaned_wav = clean_and_split(file_bytes)
-
-        if not clips or len(clips) == 0:
+        try:
+            batch = read_batch(request.form)
+        except ValueError as e:
             return jsonify({
                 "status": "error",
-                "message": "Audio too short or silent - no valid clips generated"
+                "message": str(e)
             }), 400
 
-        # Feature column layout (must match ML_Train.py exactly)
-        cols = [f"mfcc{i+1}" for i in range(13)] + [
-            "spectral_centroid",
-            "spectral_rolloff",
-            "zero_crossing_rate",
-            "pitch"
-        ]
+        # Large files were parsed straight into a temp file (UploadRequest)
+        # and never sit in RAM as one bytes object.
+        source, upload_size = read_upload(request.files["file"])
 
-        clip_results = []
-        all_predictions = []
-        all_confidences = []
-
-        for idx, clip_bytes in enumerate(clips, 1):
-            try:
-                features = extract_features(clip_bytes).reshape(1, -1)
-                features_df = pd.DataFrame(features, columns=cols)
-                features_scaled = scaler.transform(features_df)
+        if upload_size == 0:
+            return jsonify({
+                "status": "error",
+                "message": "Empty file uploaded"
+            }), 400
 
-                prob = model.predict_proba(features_scaled)[0]
-                pred_class = model.classes_[np.argmax(prob)]
-                conf = float(max(prob) * 100)
+        print(f"📁 Received file: {upload_size} bytes"
+              f"{' (spilled to disk)' if isinstance(source, str) else ''}")
 
-                pred_normalized = normalize_prediction(pred_class)
+        check_duration(source)
+        timer.lap("upload")
 
-                clip_results.append({
-                    "clip": f"clip_{idx}",
-                    "prediction": pred_normalized,
-                    "confidence": round(conf, 2)
-                })
+        # Clean + split (cleaning happens once, here)
+        signal, bounds, sr, cleaned_wav = clean_and_split(source)
+        discard_upload(source)
+        source = None
+        timer.lap("clean_split")
 
-                all_predictions.append(pred_normalized)
-                all_confidences.append(conf)
+        if not bounds:
+            return jsonify({
+                "status": "error",
+                "message": "Audio too short or silent - no valid clips generated"
+            }), 400
 
-            except Exception as e:
-                print(f"⚠️ Error processing clip {idx}: {e}")
-                continue
+        clip_results = classify_clips(bundle, signal, bounds, sr, timer)
 
-        if not clip_results:
+        if not scored_results(clip_results):
             return jsonify({
                 "status": "error",
                 "message": "Failed to process any clips"
             }), 500
 
         # Summary stats
-        summary_counter = Counter(all_predictions)
-        majority_pred = max(summary_counter, key=summary_counter.get)
-        avg_conf = float(np.mean(all_confidences))
+        summary = build_summary(clip_results, len(bounds))
 
         # Encode cleaned audio for the response.
         # Base64 keeps everything in one JSON payload, which is what Flutter
         # already expects from /predict. Larger payloads but no multipart.
         cleaned_b64 = base64.b64encode(cleaned_wav).decode("ascii")
+        timer.lap("encode")
+        cleaned_size = len(cleaned_wav)
+        del cleaned_wav, signal
+
+        request_id = uuid.uuid4().hex
+        record_prediction(request_id, summary, bundle.version, "predict", batch)
+        timer.lap("ledger")
 
         response_data = {
             "status": "success",
-            "final_prediction": majority_pred,
-            "average_confidence": round(avg_conf, 2),
-            "total_clips": int(len(clips)),
-            "male_clips": int(summary_counter.get("Male", 0)),
-            "female_clips": int(summary_counter.get("Female", 0)),
-            "prediction_summary": clip_results,
+            **summary,
+            "request_id": request_id,
+            "batch": batch,
+            "model_version": bundle.version,
             # NEW: cleaned audio sent back so the user can play what the SVM
             # actually heard. Base64-encoded WAV. Decode on the client.
             "cleaned_audio": {
                 "format": "wav",
                 "sample_rate": TARGET_SR,
                 "base64": cleaned_b64,
-                "bytes": len(cleaned_wav),
+                "bytes": cleaned_size,
             },
         }
 
-        print(f"✅ Prediction complete: {majority_pred} ({avg_conf:.2f}%)")
-        print(f"📊 Breakdown: {summary_counter}")
-        print(f"📦 Cleaned audio attached: {len(cleaned_wav)} bytes")
+        print(f"✅ Prediction complete: {summary['final_prediction']} "
+              f"({summary['average_confidence']:.2f}%)")
+        print(f"📊 Breakdown: male={summary['male_clips']} female={summary['female_clips']}"
+              f" skipped={summary['skipped_clips']}")
+        print(f"📦 Cleaned audio attached: {cleaned_size} bytes")
+        print(f"⏱️ Stages (ms): {timer.header()}")
+
+        response = jsonify(response_data)
+        # Per-stage wall time, for loadtest.py and browser dev tools.
+        response.headers["Server-Timing"] = timer.header()
+        return response, 200
+
+    except UploadTooLargeError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 413
+
+    except AudioTooLongError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 413
 
-        return jsonify(response_data), 200
+    except RequestEntityTooLarge:
+        raise  # body over MAX_CONTENT_LENGTH, see upload_too_large()
 
     except Exception as e:
         print(f"❌ Server error: {e}")
@@ -258,14 +919,213 @@ def predict():
             "message": f"Server error: {str(e)}"
         }), 500
 
+    finally:
+        discard_upload(source)
+        # Failed and rejected uploads count too: they can peak just as high.
+        report_memory("predict", memory_probe)
+
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    """Queue a recording for background processing. Returns at once (202).
+
+    Poll GET /jobs/<id> for the result. The upload is persisted before we
+    answer, so the job survives a restart.
+    """
+    if "file" not in request.files:
+        return jsonify({
+            "status": "error",
+            "message": "No file uploaded"
+        }), 400
+
+    try:
+        batch = read_batch(request.form)
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+
+    source = None
+    try:
+        file_storage = request.files["file"]
+        source, upload_size = read_upload(file_storage)
+        if upload_size == 0:
+            return jsonify({
+                "status": "error",
+                "message": "Empty file uploaded"
+            }), 400
+        check_duration(source)
+
+        suffix = os.path.splitext(file_storage.filename or "")[1]
+        job_id, input_path = job_queue.new_input_path(suffix)
+        if isinstance(source, str):
+            shutil.move(source, input_path)
+        else:
+            with open(input_path, "wb") as f:
+                f.write(source)
+        source = None
+        job = job_queue.enqueue(job_id, input_path, file_storage.filename, batch)
+        print(f"📥 Job {job.id} queued ({upload_size} bytes)")
+
+        return jsonify({
+            "status": "success",
+            "job": job_json(job),
+            "status_url": f"/jobs/{job.id}",
+        }), 202
+
+    except (UploadTooLargeError, AudioTooLongError) as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 413
+
+    except Exception as e:
+        print(f"❌ Job submit error: {e}")
+        return jsonify({
+            "status": "error",
+            "message": f"Server error: {str(e)}"
+        }), 500
+
+    finally:
+        discard_upload(source)
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """Job status; `result` has the /predict summary once job_status is done."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({
+            "status": "error",
+            "message": "Job not found"
+        }), 404
+    return jsonify({
+        "status": "success",
+        "job": job_json(job),
+    }), 200
+
+
+@app.route("/jobs/<job_id>/audio", methods=["GET"])
+def get_job_audio(job_id):
+    """Cleaned audio of a job as 16-bit WAV (what /predict returns inline)."""
+    path = _cleaned_path(job_id)
+    if job_queue.get(job_id) is None or not os.path.exists(path):
+        return jsonify({
+            "status": "error",
+            "message": "Cleaned audio not available"
+        }), 404
+    y, sr = sf.read(path, dtype="float32")
+    return app.response_class(to_wav_bytes(y, sr), mimetype="audio/wav")
+
+
+def _stats_response(group_by, groups):
+    return jsonify({
+        "status": "success",
+        "group_by": group_by,
+        "groups": groups,
+    }), 200
+
+
+@app.route("/stats/daily", methods=["GET"])
+def stats_daily():
+    """Sex-ratio counts + confidence histogram per day, from the rollups.
+
+    Query: since, until (YYYY-MM-DD, inclusive; default the last 30 days),
+    model_version.
+    """
+    since = request.args.get("since")
+    until = request.args.get("until")
+    try:
+        for day in (since, until):
+            if day:
+                time.strptime(day, "%Y-%m-%d")
+    except ValueError:
+        return jsonify({
+            "status": "error",
+            "message": "since/until must be YYYY-MM-DD"
+        }), 400
+    if not since and not until:
+        since = day_of(time.time() - (STATS_DEFAULT_DAYS - 1) * 86400)
+
+    groups = ledger.stats("day", since=since, until=until,
+                          model_version=request.args.get("model_version"))
+    return _stats_response("day", groups)
+
+
+@app.route("/stats/batches", methods=["GET"])
+def stats_batches():
+    """Same totals per batch, most recently active first.
+
+    Query: batch (comma-separated ids), model_version, limit (default 50).
+    """
+    keys = [b.strip() for b in request.args.get("batch", "").split(",") if b.strip()]
+    try:
+        limit = int(request.args.get("limit", STATS_DEFAULT_BATCHES))
+    except ValueError:
+        return jsonify({
+            "status": "error",
+            "message": "limit must be an integer"
+        }), 400
+
+    groups = ledger.stats("batch", keys=keys or None, limit=max(limit, 0),
+                          model_version=request.args.get("model_version"))
+    return _stats_response("batch", groups)
+
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    """Werkzeug rejects bodies over MAX_CONTENT_LENGTH while parsing them."""
+    return jsonify({
+        "status": "error",
+        "message": f"Upload exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit"
+    }), 413
+
 
 @app.route("/status", methods=["GET"])
 def status():
     """Health check endpoint."""
     return jsonify({
         "status": "ready" if server_ready else "warming_up",
-        "model_loaded": model is not None,
-        "scaler_loaded": scaler is not None
+        "model_loaded": active is not None,
+        "scaler_loaded": active is not None,
+        "model_version": active.version if active else None,
+    }), 200
+
+
+@app.route("/admin/reload", methods=["POST"])
+def admin_reload():
+    """Hot-swap the model. Body (optional): {"version": "<name>"}.
+
+    With a version, it is loaded here first and CURRENT repointed only if
+    that worked; the other workers pick it up through their file watch.
+    Without one, CURRENT is reloaded.
+    """
+    token = request.headers.get("X-Admin-Token", "")
+    if not ADMIN_TOKEN or not hmac.compare_digest(token, ADMIN_TOKEN):
+        return jsonify({
+            "status": "error",
+            "message": "Forbidden"
+        }), 403
+
+    version = (request.get_json(silent=True) or {}).get("version")
+    try:
+        bundle = reload_model(version, make_current=bool(version))
+    except (ValueError, FileNotFoundError) as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+    except Exception as e:
+        print(f"❌ Model reload failed: {e}")
+        return jsonify({
+            "status": "error",
+            "message": f"Reload failed: {str(e)}"
+        }), 500
+
+    return jsonify({
+        "status": "success",
+        "model_version": bundle.version,
     }), 200
 
 
@@ -280,10 +1140,20 @@ def test():
 
     return jsonify({
         "status": "ready",
-        "model_classes": model.classes_.tolist() if model else [],
+        "model_classes": active.model.classes_.tolist() if active else [],
+        "model_version": active.version if active else None,
         "audio_pipeline": {
             "target_sr": TARGET_SR,
             "cleaning": "HPF 300Hz + LPF 8kHz + spectral gate + peak-norm + trim",
+            "clip_mode": CLIP_MODE,
+            "window_lengths_s": WINDOW_LENGTHS_S if CLIP_MODE == "sliding" else [CLIP_LENGTH_MS / 1000],
+            "window_hop_s": WINDOW_HOP_S if CLIP_MODE == "sliding" else CLIP_LENGTH_MS / 1000,
+            "quality_gate": QUALITY_GATE,
+        },
+        "limits": {
+            "max_upload_bytes": MAX_UPLOAD_BYTES,
+            "max_duration_s": MAX_DURATION_S,
+            "spill_threshold_bytes": SPILL_THRESHOLD_BYTES,
         },
         "sample_responses": {
             "male": normalize_prediction("male"),
@@ -301,7 +1171,13 @@ def home():
         "status": "ready" if server_ready else "warming_up",
         "endpoints": {
             "/predict": "POST - Upload audio, returns prediction + cleaned audio (base64)",
-            "/status": "GET - Check server status",
+            "/jobs": "POST - Queue a long recording, returns a job id (202)",
+            "/jobs/<id>": "GET - Job status + result when done",
+            "/jobs/<id>/audio": "GET - Cleaned audio of a finished job (WAV)",
+            "/stats/daily": "GET - Male/female counts + confidence histogram per day",
+            "/stats/batches": "GET - Same per batch (optional `batch` form field on uploads)",
+            "/status": "GET - Check server status + active model version",
+            "/admin/reload": "POST - Hot-swap model version (X-Admin-Token)",
             "/test": "GET - Test model configuration"
         }
     }), 200
@@ -1,7 +1,5 @@
 import os
-import numpy as np
 import pandas as pd
-import librosa
 from sklearn.svm import SVC
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
@@ -13,9 +11,16 @@ import joblib
 # It replaces librosa.load() so training and inference see identical data.
 # CRITICAL: any future change to audio_clean.py requires retraining the model.
 from audio_clean import clean_audio
+# Shared 17-dim feature vector — the service calls the same function.
+from features import extract_features as clip_features, FEATURE_COLUMNS
+from model_store import publish
+# Reduced-set SVM: fewer support vectors, same predict_proba interface.
+from svm_compress import compress_svm, holdout_report, print_report, reduce_svm
 
 # === SETTINGS ===
 dataset_path = r"C:\Users\User\OneDrive - Innobyte\Desktop\etech\lib\python\Day8"
+COMPRESS_MODEL = True        # distill the SVC into a smaller kernel expansion
+MAX_ACCURACY_DROP = 0.01     # accuracy budget for compression (1 point)
 
 # === FUNCTION: Extract audio features ===
 def extract_features(file_path):
@@ -28,17 +33,10 @@ def extract_features(file_path):
         if y.size == 0:
             return None
 
-        # Core Features — UNCHANGED so the feature vector layout stays identical
-        # to the old model's scaler (13 MFCCs + 4 scalars = 17 dims).
-        mfccs = np.mean(librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13).T, axis=0)
-        spectral_centroid = np.mean(librosa.feature.spectral_centroid(y=y, sr=sr))
-        spectral_rolloff = np.mean(librosa.feature.spectral_rolloff(y=y, sr=sr))
-        zero_crossing_rate = np.mean(librosa.feature.zero_crossing_rate(y))
-        pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-        pitch = np.mean(pitches[pitches > 0]) if np.any(pitches > 0) else 0
-
-        features = np.hstack([mfccs, spectral_centroid, spectral_rolloff, zero_crossing_rate, pitch])
-        return features
+        # Core Features — layout UNCHANGED so the vector stays identical to
+        # the old model's scaler (13 MFCCs + 4 scalars = 17 dims). Computed
+        # in float32 from one shared STFT, see features.py.
+        return clip_features(y, sr)
 
     except Exception as e:
         print(f"⚠️ Error processing {file_path}: {e}")
@@ -66,8 +64,7 @@ if len(data) == 0:
     raise ValueError(" No valid audio files found in dataset.")
 
 # === STEP 2: Convert to DataFrame and normalize ===
-cols = [f"mfcc{i+1}" for i in range(13)] + ["spectral_centroid", "spectral_rolloff", "zero_crossing_rate", "pitch"]
-df = pd.DataFrame(data, columns=cols)
+df = pd.DataFrame(data, columns=FEATURE_COLUMNS)
 df["label"] = labels
 
 df.to_csv(os.path.join(dataset_path, "duckling_features_enhanced.csv"), index=False)
@@ -89,10 +86,53 @@ print("\n📊 Classification Report:")
 print(classification_report(y_test, y_pred))
 print(f" Accuracy: {round(accuracy_score(y_test, y_pred)*100,2)}%")
 
+# === STEP 3b: Compress (support-vector reduction) ===
+# Scoring cost grows with the SV count. The budget is picked on a validation
+# split: a scratch SVC fitted on the rest of the training rows is compressed
+# at shrinking budgets, and the smallest within MAX_ACCURACY_DROP wins. That
+# budget is then applied to `model` above, which saw every training row, so
+# the shipped SVC and its distilled copy lose no data to the selection.
+compressed = None
+if COMPRESS_MODEL:
+    print("\n🗜️ Compressing SVM (reduced-set distillation)...")
+    try:
+        X_fit, X_val, y_fit, y_val = train_test_split(X_train, y_train, test_size=0.2, random_state=42)
+        scratch = SVC(kernel="rbf", gamma="scale", probability=True).fit(X_fit, y_fit)
+        chosen, report = compress_svm(scratch, X_fit, y_fit, X_val, y_val,
+                                      max_accuracy_drop=MAX_ACCURACY_DROP)
+        print_report(report)
+        if chosen is None:
+            print("⚠️ No budget met the accuracy bar — keeping the full model.")
+        else:
+            budget = report[-1]["budget"]
+            compressed = reduce_svm(model, X_train, y_train,
+                                    int(round(budget * len(model.support_vectors_))))
+            print(f"✅ Compressed: {len(model.support_vectors_)} → "
+                  f"{compressed.n_support_vectors} support vectors")
+            print("\n📊 Test split (not used for training or budget selection):")
+            print_report(holdout_report(model, compressed, X_test, y_test))
+    except ValueError as e:
+        print(f"⚠️ Compression skipped: {e}")
+
 # === STEP 4: Save model & scaler ===
 # NOTE: model filename bumped to mark that this generation was trained on
 # cleaned audio. Old .pkl files will NOT work with the new inference path —
 # they expect un-cleaned features.
 joblib.dump(model, os.path.join(dataset_path, "duckling_svm_rbf_cleaned.pkl"))
 joblib.dump(scaler, os.path.join(dataset_path, "duckling_scaler_cleaned.pkl"))
-print("💾 Model and scaler saved successfully.")
\ No newline at end of file
+if compressed is not None:
+    joblib.dump(compressed, os.path.join(dataset_path, "duckling_svm_rbf_cleaned_reduced.pkl"))
+print("💾 Model and scaler saved successfully.")
+
+# === STEP 5: Publish as a new model version ===
+# Upload the whole models/ folder to the Render volume. Running servers
+# pick up the new CURRENT within MODEL_WATCH_INTERVAL_S — no restart.
+# The compressed model (if any) becomes active; the full one is published
+# alongside as "<version>-full" so /admin/reload can switch back to it.
+models_dir = os.path.join(dataset_path, "models")
+if compressed is not None:
+    version = publish(compressed, scaler, model_dir=models_dir)
+    publish(model, scaler, f"{version}-full", model_dir=models_dir, make_current=False)
+else:
+    version = publish(model, scaler, model_dir=models_dir)
+print(f"📦 Published model version {version}")
\ No newline at end of file
@@ -36,6 +36,8 @@ Install deps (add to requirements.txt):
 from __future__ import annotations
 
 import io
+import os
+import tempfile
 from typing import Tuple
 
 import numpy as np
@@ -56,45 +58,127 @@ PEAK_DBFS = -3.0            # post-normalize peak level
 SILENCE_TOP_DB = 30         # librosa.effects.trim threshold (dB below max)
 NR_PROP_DECREASE = 0.8      # how aggressively to subtract estimated noise
 NR_STATIONARY = False       # adaptive (non-stationary) noise estimate
+MAX_DURATION_S = None       # hard cap on decoded length (None = unlimited)
 
 # Safety: if LPF >= Nyquist, scale it down.
 if LPF_HZ >= TARGET_SR / 2:
     LPF_HZ = (TARGET_SR / 2) - 100
 
 
+# =============================================================================
+# ERRORS
+# =============================================================================
+
+class AudioTooLongError(ValueError):
+    """Raised when a recording exceeds the configured duration limit."""
+
+
 # =============================================================================
 # INTERNAL HELPERS
 # =============================================================================
 
-def _bandpass_sos(sr: int):
+def _bandpass_sos(sr: int, dtype=np.float32):
     """Build a 4th-order Butterworth band-pass as second-order sections.
 
     SOS form is numerically stable for tight bands; sosfiltfilt gives
     zero-phase filtering so we don't smear the duckling transients.
+    The coefficients are cast to `dtype` because sosfiltfilt computes in
+    the common type of (sos, x) — float64 coefficients would silently
+    promote a float32 signal to a float64 copy.
     """
     nyq = sr / 2
     low = HPF_HZ / nyq
     high = LPF_HZ / nyq
-    return butter(N=4, Wn=[low, high], btype="bandpass", output="sos")
+    return butter(N=4, Wn=[low, high], btype="bandpass", output="sos").astype(dtype)
 
 
 def _peak_normalize(y: np.ndarray, target_dbfs: float = PEAK_DBFS) -> np.ndarray:
-    """Scale signal so its peak sits at `target_dbfs`. Silent → unchanged."""
-    peak = float(np.max(np.abs(y))) if y.size else 0.0
+    """Scale signal so its peak sits at `target_dbfs`. Silent → unchanged.
+
+    Scales in place — callers pass a buffer they own, so there is no need
+    for another full-length copy of the recording.
+    """
+    peak = float(max(np.max(y), -np.min(y))) if y.size else 0.0
     if peak < 1e-9:
         return y
     target_linear = 10 ** (target_dbfs / 20)
-    return (y / peak) * target_linear
+    y *= y.dtype.type(target_linear / peak)
+    return y
+
+
+def _load_mono(path_or_bytes, sr_out: int, max_duration_s, dtype=np.float32) -> Tuple[np.ndarray, int]:
+    """Decode to mono `dtype` at `sr_out`, reading at most `max_duration_s`.
+
+    Raises AudioTooLongError if the source is longer than the limit. Only
+    `max_duration_s` (+ one sample) is ever decoded, so a huge upload can't
+    blow up memory before we get a chance to reject it.
+
+    Bytes go to soundfile directly. Formats it can't read from memory
+    (m4a, some ogg) are written to a temp file and take the same
+    librosa/audioread path as a spilled upload, so whether a file decodes
+    never depends on its size.
+    """
+    if isinstance(path_or_bytes, (bytes, bytearray)):
+        try:
+            f = sf.SoundFile(io.BytesIO(path_or_bytes))
+        except sf.SoundFileError:
+            return _load_mono_via_file(path_or_bytes, sr_out, max_duration_s, dtype)
+        with f:
+            sr = f.samplerate
+            frames = -1
+            if max_duration_s is not None:
+                frames = int(max_duration_s * sr) + 1
+            y = f.read(frames=frames, dtype=dtype, always_2d=False)
+        if y.ndim > 1:
+            y = np.mean(y, axis=1, dtype=dtype)
+        too_long = max_duration_s is not None and len(y) > max_duration_s * sr
+        if sr != sr_out and not too_long:
+            y = librosa.resample(y, orig_sr=sr, target_sr=sr_out)
+    else:
+        duration = None
+        if max_duration_s is not None:
+            duration = max_duration_s + 1.0 / sr_out
+        y, _ = librosa.load(path_or_bytes, sr=sr_out, mono=True, duration=duration, dtype=dtype)
+        too_long = max_duration_s is not None and len(y) > max_duration_s * sr_out
+
+    if too_long:
+        raise AudioTooLongError(f"Audio longer than {max_duration_s:g}s limit")
+    return y, sr_out
+
+
+def _load_mono_via_file(data: bytes, sr_out: int, max_duration_s, dtype) -> Tuple[np.ndarray, int]:
+    """_load_mono for bytes soundfile can't parse: decode from a temp file."""
+    fd, path = tempfile.mkstemp(prefix="audio-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return _load_mono(path, sr_out, max_duration_s, dtype)
+    finally:
+        os.remove(path)
 
 
 # =============================================================================
 # PUBLIC API
 # =============================================================================
 
+def audio_duration(path_or_bytes) -> float:
+    """Duration in seconds, read from the file header where possible.
+
+    Cheap enough to call before `clean_audio()` to reject over-long uploads
+    without decoding them. Raises if the header can't be read from bytes;
+    clean_audio still enforces the limit while decoding.
+    """
+    if isinstance(path_or_bytes, (bytes, bytearray)):
+        return float(sf.info(io.BytesIO(path_or_bytes)).duration)
+    return float(librosa.get_duration(path=path_or_bytes))
+
+
 def clean_audio(
     path_or_bytes,
     sr_out: int = TARGET_SR,
     apply_spectral_gate: bool = True,
+    max_duration_s=MAX_DURATION_S,
+    dtype=np.float32,
 ) -> Tuple[np.ndarray, int]:
     """Load and clean an audio file. Returns (y, sr).
 
@@ -106,31 +190,33 @@ def clean_audio(
         Target sample rate. Keep default unless you know why.
     apply_spectral_gate : bool
         Toggle spectral gating. Useful for ablation studies; default True.
+    max_duration_s : float | None
+        Hard limit on input length. Longer inputs raise AudioTooLongError
+        after decoding at most this much audio. None disables the check.
+    dtype : np.dtype
+        Working precision for every stage. float32 (default) keeps the whole
+        chain in single precision with no promote-and-cast-back copies;
+        float64 is only for reference runs (see bench_float32.py).
 
     Returns
     -------
-    y : np.ndarray, float32, mono
+    y : np.ndarray, `dtype`, mono
     sr : int (== sr_out)
     """
     # 1. Load + resample + force mono.
     #    librosa handles many formats via audioread; for raw bytes we hand to
     #    soundfile first to avoid temp files.
-    if isinstance(path_or_bytes, (bytes, bytearray)):
-        y, sr = sf.read(io.BytesIO(path_or_bytes), dtype="float32", always_2d=False)
-        if y.ndim > 1:
-            y = np.mean(y, axis=1)
-        if sr != sr_out:
-            y = librosa.resample(y, orig_sr=sr, target_sr=sr_out)
-            sr = sr_out
-    else:
-        y, sr = librosa.load(path_or_bytes, sr=sr_out, mono=True)
+    y, sr = _load_mono(path_or_bytes, sr_out, max_duration_s, dtype)
 
     if y.size == 0:
-        return y.astype(np.float32), sr_out
+        return y.astype(dtype, copy=False), sr_out
 
     # 2 + 3. Band-pass (HPF + LPF combined).
-    sos = _bandpass_sos(sr)
-    y = sosfiltfilt(sos, y).astype(np.float32)
+    #    Each stage rebinds `y`, so the previous full-length buffer is freed
+    #    as soon as the next one exists — at most two copies live at once.
+    #    With matching sos/y dtypes the filter output is already `dtype`.
+    sos = _bandpass_sos(sr, dtype)
+    y = sosfiltfilt(sos, y).astype(dtype, copy=False)
 
     # 4. Spectral gating — adaptive noise estimate from the recording itself.
     if apply_spectral_gate:
@@ -140,29 +226,36 @@ def clean_audio(
                 sr=sr,
                 stationary=NR_STATIONARY,
                 prop_decrease=NR_PROP_DECREASE,
-            ).astype(np.float32)
+            ).astype(dtype, copy=False)
         except Exception as e:
             # Don't fail the whole pipeline if noisereduce hiccups on a short clip.
             print(f"⚠️ Spectral gating skipped: {e}")
 
     # 5. Peak-normalize before trimming, so trim threshold is meaningful.
+    #    `y` is our own buffer at this point, so scale it in place.
     y = _peak_normalize(y)
 
     # 6. Trim leading/trailing silence (per-recording, conservative threshold).
+    #    trim returns a view into `y`, not a copy.
     y, _ = librosa.effects.trim(y, top_db=SILENCE_TOP_DB)
 
-    return y.astype(np.float32), sr
+    return y.astype(dtype, copy=False), sr
+
+
+def to_wav_bytes(y: np.ndarray, sr: int) -> bytes:
+    """Encode a cleaned signal as 16-bit PCM WAV bytes."""
+    buf = io.BytesIO()
+    sf.write(buf, y, sr, format="WAV", subtype="PCM_16")
+    return buf.getvalue()
 
 
-def clean_audio_to_wav_bytes(path_or_bytes) -> Tuple[bytes, int]:
+def clean_audio_to_wav_bytes(path_or_bytes, max_duration_s=MAX_DURATION_S) -> Tuple[bytes, int]:
     """Convenience: clean → return WAV-encoded bytes + sample rate.
 
     Used by the Flask endpoint to return cleaned audio to the Flutter app.
     """
-    y, sr = clean_audio(path_or_bytes)
-    buf = io.BytesIO()
-    sf.write(buf, y, sr, format="WAV", subtype="PCM_16")
-    return buf.getvalue(), sr
+    y, sr = clean_audio(path_or_bytes, max_duration_s=max_duration_s)
+    return to_wav_bytes(y, sr), sr
 
 
 # =============================================================================
@@ -0,0 +1,138 @@
+"""
+bench_float32.py
+================
+
+Measures the float32 clean → split → feature path against a float64
+reference, and reports the numeric tolerance on the 17 features plus the
+speed / peak-memory difference.
+
+Tolerance is reported in units of each feature's standard deviation over
+the corpus, i.e. the scale the StandardScaler feeds the SVM.
+
+Reference path = what the service did before the float32 change:
+    clean_audio in float64 → each 3 s clip exported as a 16-bit WAV and
+    read back with librosa.load → one librosa call per feature (4 STFTs).
+New path = what the service does now:
+    clean_audio in float32 → features.extract_features (1 shared STFT).
+
+tests/test_features.py holds extract_features to the same reference.
+
+Usage:
+    python bench_float32.py                      # bundled .wav samples
+    python bench_float32.py a.wav b.wav --seconds 600
+
+`--seconds` tiles each input up to that length, to see how the gain
+scales on long recordings.
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import io
+import os
+import time
+import tracemalloc
+
+import numpy as np
+import librosa
+import soundfile as sf
+
+from audio_clean import clean_audio
+from features import extract_features, FEATURE_COLUMNS
+
+CLIP_SECONDS = 3
+
+
+def _wav16_roundtrip(y, sr):
+    """Encode as a 16-bit WAV and decode it with librosa.load, as the old
+    service did for every clip (pydub export → extract_features)."""
+    buf = io.BytesIO()
+    sf.write(buf, y, sr, format="WAV", subtype="PCM_16")
+    buf.seek(0)
+    return librosa.load(buf, sr=None)[0]
+
+
+def _reference_features(y, sr):
+    """The original per-call feature code, kept verbatim for comparison."""
+    mfccs = np.mean(librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13).T, axis=0)
+    spectral_centroid = np.mean(librosa.feature.spectral_centroid(y=y, sr=sr))
+    spectral_rolloff = np.mean(librosa.feature.spectral_rolloff(y=y, sr=sr))
+    zero_crossing_rate = np.mean(librosa.feature.zero_crossing_rate(y))
+    pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
+    pitch = np.mean(pitches[pitches > 0]) if np.any(pitches > 0) else 0
+    return np.hstack([mfccs, spectral_centroid, spectral_rolloff, zero_crossing_rate, pitch])
+
+
+def reference_features(clip, sr):
+    """Features of one clip the way the old inference path computed them."""
+    return _reference_features(_wav16_roundtrip(clip, sr), sr)
+
+
+def _clips(y, sr):
+    n = CLIP_SECONDS * sr
+    return [y[s:s + n] for s in range(0, len(y), n) if len(y[s:s + n]) > sr]
+
+
+def _run(source, dtype, featurize):
+    """Clean + split + featurize once. Returns (features, seconds, peak MB)."""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    y, sr = clean_audio(source, dtype=dtype)
+    feats = np.array([featurize(c, sr) for c in _clips(y, sr)])
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return feats, elapsed, peak / (1024 * 1024)
+
+
+def _tiled_wav_bytes(path, seconds):
+    y, sr = sf.read(path, dtype="float32", always_2d=False)
+    if seconds:
+        y = np.resize(y, int(seconds * sr))
+    buf = io.BytesIO()
+    sf.write(buf, y, sr, format="WAV", subtype="FLOAT")
+    return buf.getvalue(), len(y) / sr
+
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--seconds", type=float, default=0,
+                        help="tile each input to this duration (0 = as-is)")
+    args = parser.parse_args()
+    files = args.files or sorted(glob.glob(os.path.join(here, "**", "*.wav"), recursive=True))
+
+    # First pass pays numba JIT / FFT plan setup; keep it out of the timings.
+    if files:
+        warm, _ = _tiled_wav_bytes(files[0], 0)
+        _run(warm, np.float64, reference_features)
+        _run(warm, np.float32, extract_features)
+
+    all_ref, all_new = [], []
+    print(f"{'file':40s} {'dur':>7s} {'ref s':>7s} {'f32 s':>7s} {'ref MB':>7s} {'f32 MB':>7s}")
+    for path in files:
+        source, duration = _tiled_wav_bytes(path, args.seconds)
+        ref, ref_t, ref_mb = _run(source, np.float64, reference_features)
+        new, new_t, new_mb = _run(source, np.float32, extract_features)
+        if len(ref) and len(ref) == len(new):
+            all_ref.append(ref)
+            all_new.append(new)
+        print(f"{os.path.basename(path)[:40]:40s} {duration:6.1f}s "
+              f"{ref_t:7.2f} {new_t:7.2f} {ref_mb:7.1f} {new_mb:7.1f}")
+
+    if not all_ref:
+        return
+    ref, new = np.vstack(all_ref), np.vstack(all_new)
+    # Floor the std so a constant feature (tiny corpus) doesn't divide by 0.
+    scale = np.maximum(ref.std(axis=0), 1e-6)
+    worst_abs = np.abs(new - ref).max(axis=0)
+    print(f"\nWorst per-feature error over {len(ref)} clips:")
+    print(f"  {'feature':20s} {'abs':>10s} {'/ std':>10s}")
+    for name, err, sd in zip(FEATURE_COLUMNS, worst_abs, scale):
+        print(f"  {name:20s} {err:10.2e} {err / sd:10.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+clip_quality.py
+===============
+
+Cheap per-clip quality gate, run on the cleaned float32 clips *before*
+the MFCC / piptrack / SVM path.
+
+After cleaning and splitting, some clips are mostly the 100 ms padding
+silence between chunks, or residual noise the spectral gate left behind.
+They cost as much to score as a real peep clip and then dilute the
+majority vote. Three statistics catch them, all computed for every clip
+at once with a handful of array operations:
+
+- RMS energy (dBFS)          — near-silent clips.
+- Voiced-frame ratio         — fraction of 32 ms frames above an activity
+                               threshold; padding-heavy clips score low.
+- Spectral flatness          — Wiener entropy of the active frames,
+                               over the HPF–LPF pass band only (the
+                               stop bands clean_audio emptied would pull
+                               it down); ≈0.5 for white noise, low for
+                               tonal peeps.
+
+Clips failing a hard threshold are skipped. The rest get a vote weight in
+(0, 1] that shrinks for sparse or noise-like clips.
+
+Thresholds assume clean_audio's -3 dBFS peak normalisation.
+"""
+
+from __future__ import annotations
+
+from typing import List, NamedTuple
+
+import numpy as np
+from scipy.fft import rfft, rfftfreq
+
+from audio_clean import HPF_HZ, LPF_HZ
+
+
+# =============================================================================
+# CONFIG
+# =============================================================================
+
+FRAME = 512                     # 32 ms @ 16 kHz, non-overlapping
+MIN_CLIP_RMS_DB = -45.0         # below this the clip is effectively silent
+ACTIVE_FRAME_DB = -35.0         # a frame is "voiced" above this
+MIN_VOICED_RATIO = 0.05         # fewer voiced frames → skip
+FULL_WEIGHT_VOICED_RATIO = 0.3  # at or above this, no down-weighting
+MAX_FLATNESS = 0.4              # flatter than this → noise, skip (cleaned white ≈ 0.52)
+BATCH = 64                      # clips per FFT batch (bounds memory)
+
+
+class ClipQuality(NamedTuple):
+    rms_db: float
+    voiced_ratio: float
+    flatness: float
+    keep: bool
+    weight: float
+    reason: str
+
+
+# =============================================================================
+# INTERNAL HELPERS
+# =============================================================================
+
+def _frame_batch(clips, n_frames):
+    """Stack clips into (n, n_frames, FRAME), zero-padded, + valid-frame mask."""
+    X = np.zeros((len(clips), n_frames * FRAME), dtype=np.float32)
+    valid = np.zeros((len(clips), n_frames), dtype=bool)
+    for i, c in enumerate(clips):
+        m = min(len(c), n_frames * FRAME)
+        X[i, :m] = c[:m]
+        valid[i, :m // FRAME] = True
+    return X.reshape(len(clips), n_frames, FRAME), valid
+
+
+def _pass_band(sr):
+    """rfft bins of a FRAME-long frame that lie inside clean_audio's band."""
+    freqs = rfftfreq(FRAME, 1.0 / sr)
+    return (freqs >= HPF_HZ) & (freqs <= min(LPF_HZ, sr / 2))
+
+
+def _batch_stats(clips, band):
+    n_frames = max(1, max(len(c) for c in clips) // FRAME)
+    frames, valid = _frame_batch(clips, n_frames)
+    n_valid = np.maximum(valid.sum(axis=1), 1)
+
+    power = np.mean(frames ** 2, axis=2)                       # (n, frames)
+    rms_db = 10 * np.log10(np.sum(power * valid, axis=1) / n_valid + 1e-12)
+    voiced = valid & (10 * np.log10(power + 1e-12) > ACTIVE_FRAME_DB)
+    voiced_ratio = voiced.sum(axis=1) / n_valid
+
+    spec = np.abs(rfft(frames * np.hanning(FRAME).astype(np.float32), axis=2)[..., band]) ** 2 + 1e-12
+    flat = np.exp(np.mean(np.log(spec), axis=2)) / np.mean(spec, axis=2)
+    # Average over voiced frames; fall back to all valid frames if none.
+    use = np.where(voiced.any(axis=1, keepdims=True), voiced, valid)
+    flatness = np.sum(flat * use, axis=1) / np.maximum(use.sum(axis=1), 1)
+    return rms_db, voiced_ratio, flatness
+
+
+# =============================================================================
+# PUBLIC API
+# =============================================================================
+
+def score_clips(clips, sr: int = 16_000) -> List[ClipQuality]:
+    """Quality verdict for each clip, in order. `sr` picks the flatness
+    band; FRAME itself is sized for the 16 kHz pipeline."""
+    band = _pass_band(sr)
+    out = []
+    for b in range(0, len(clips), BATCH):
+        rms_db, voiced_ratio, flatness = _batch_stats(clips[b:b + BATCH], band)
+        for r, v, f in zip(rms_db, voiced_ratio, flatness):
+            if r < MIN_CLIP_RMS_DB:
+                keep, reason = False, "silent"
+            elif v < MIN_VOICED_RATIO:
+                keep, reason = False, "mostly silence"
+            elif f > MAX_FLATNESS:
+                keep, reason = False, "noise-like"
+            else:
+                keep, reason = True, ""
+            weight = 0.0
+            if keep:
+                weight = min(1.0, v / FULL_WEIGHT_VOICED_RATIO) * (1.0 - f / MAX_FLATNESS * 0.5)
+            out.append(ClipQuality(float(r), float(v), float(f), keep, float(weight), reason))
+    return out
+
+
+def gate(qualities: List[ClipQuality]) -> List[ClipQuality]:
+    """Never skip everything: if no clip passes, keep the best one (by
+    voiced ratio) so the request still gets an answer."""
+    if not qualities or any(q.keep for q in qualities):
+        return qualities
+    best = max(range(len(qualities)), key=lambda i: qualities[i].voiced_ratio)
+    qualities = list(qualities)
+    qualities[best] = qualities[best]._replace(keep=True, weight=1.0, reason="")
+    return qualities
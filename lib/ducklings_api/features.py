@@ -0,0 +1,268 @@
+"""
+features.py
+===========
+
+Single source of truth for the 17-dim feature vector (13 MFCC means +
+spectral centroid + spectral rolloff + zero-crossing rate + pitch).
+USED BY BOTH TRAINING AND INFERENCE, same as audio_clean.py.
+
+The vector is numerically the same as the original per-call version:
+
+    mfcc(y, sr, n_mfcc=13) | spectral_centroid(y, sr) |
+    spectral_rolloff(y, sr) | zero_crossing_rate(y) | piptrack(y, sr)
+
+but it is computed the cheap way:
+
+- One magnitude STFT is shared by MFCC, centroid, rolloff and piptrack
+  (librosa computes the same n_fft=2048 / hop=512 STFT four times otherwise).
+- Everything stays in the input dtype. A float32 signal yields complex64
+  spectra and float32 features; the frequency grid is cast down too, so
+  the centroid/rolloff weighting doesn't promote to float64.
+- Input is the cleaned NumPy array itself, no WAV round-trip per clip.
+
+Every feature is a mean over STFT frames, so a whole recording can also be
+analysed once and any window's vector assembled from the per-frame values
+(FrameFeatureCache); only the few frames at each window edge, which see
+zero padding, are recomputed. That is what makes overlapping /
+multi-scale windows cheap: the FFT work is one pass over the audio, not
+one per window. Both paths share _frame_arrays, so they can't drift apart,
+and tests/test_features.py checks they agree.
+
+If you change anything here, retrain (ML Train.py) — same rule as cleaning.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+import librosa
+from scipy.fft import dct
+
+
+# =============================================================================
+# CONFIG — librosa defaults, pinned so the shared STFT matches each feature.
+# =============================================================================
+
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MFCC = 13
+TOP_DB = 80.0       # power_to_db floor, relative to the loudest mel bin
+
+FEATURE_COLUMNS = [f"mfcc{i+1}" for i in range(N_MFCC)] + [
+    "spectral_centroid",
+    "spectral_rolloff",
+    "zero_crossing_rate",
+    "pitch",
+]
+
+
+# =============================================================================
+# INTERNAL HELPERS
+# =============================================================================
+
+@lru_cache(maxsize=8)
+def _fft_freqs(sr: int, dtype) -> np.ndarray:
+    """FFT bin centre frequencies, column-shaped, in the signal's dtype."""
+    return librosa.fft_frequencies(sr=sr, n_fft=N_FFT).astype(dtype).reshape(-1, 1)
+
+
+def _frame_arrays(y: np.ndarray, sr: int):
+    """Per-frame arrays behind every feature, from one shared STFT.
+
+    Returns (mel, centroid, rolloff, zcr, pitches): each is
+    (n_values, n_frames). mel is the power mel spectrogram (MFCCs are
+    taken from it by the caller, because the dB floor depends on which
+    frames are in the clip); pitches is piptrack's (n_bins, n_frames)
+    grid, 0 where no pitch was picked.
+    """
+    # Magnitude spectrogram, shared by every spectral feature below.
+    S = np.abs(librosa.stft(y, n_fft=N_FFT, hop_length=HOP_LENGTH))
+
+    mel = librosa.feature.melspectrogram(S=S ** 2, sr=sr, n_fft=N_FFT)
+
+    freqs = _fft_freqs(sr, np.dtype(y.dtype))
+    centroid = librosa.feature.spectral_centroid(S=S, sr=sr, freq=freqs)
+    rolloff = librosa.feature.spectral_rolloff(S=S, sr=sr, freq=freqs)
+    zcr = librosa.feature.zero_crossing_rate(y, frame_length=N_FFT, hop_length=HOP_LENGTH)
+    pitches, _ = librosa.piptrack(S=S, sr=sr, n_fft=N_FFT, hop_length=HOP_LENGTH)
+    return mel, centroid, rolloff, zcr, pitches
+
+
+def _as_float(y: np.ndarray) -> np.ndarray:
+    dtype = y.dtype if np.issubdtype(y.dtype, np.floating) else np.float32
+    return np.asarray(y, dtype=dtype)
+
+
+# =============================================================================
+# PUBLIC API
+# =============================================================================
+
+def extract_features(y: np.ndarray, sr: int) -> np.ndarray:
+    """Return the 17-dim feature vector for one clip.
+
+    Parameters
+    ----------
+    y : np.ndarray
+        Cleaned mono signal (normally a float32 slice of clean_audio output).
+    sr : int
+        Sample rate of `y`.
+
+    Returns
+    -------
+    np.ndarray, shape (17,), same float dtype as `y`.
+    """
+    y = _as_float(y)
+    mel, centroid, rolloff, zcr, pitches = _frame_arrays(y, sr)
+
+    mfcc = librosa.feature.mfcc(S=librosa.power_to_db(mel, top_db=TOP_DB), n_mfcc=N_MFCC)
+    mfccs = np.mean(mfcc.T, axis=0)
+    spectral_centroid = np.mean(centroid)
+    spectral_rolloff = np.mean(rolloff)
+    zero_crossing_rate = np.mean(zcr)
+    voiced = pitches[pitches > 0]
+    pitch = np.mean(voiced) if voiced.size else 0
+
+    return np.hstack(
+        [mfccs, spectral_centroid, spectral_rolloff, zero_crossing_rate, pitch]
+    ).astype(y.dtype, copy=False)
+
+
+def window_bounds(n_samples: int, sr: int, lengths_s: Iterable[float],
+                  hop_s: float, min_s: float = 1.0, align: int = 1) -> List[Tuple[int, int]]:
+    """[start, end) sample ranges of sliding windows, one pass per length.
+
+    Each pass stops at the first window that reaches the end of the
+    signal; a trailing window must be longer than `min_s`. With
+    hop == length this is exactly the back-to-back clip split.
+
+    `align` rounds the hop to a multiple of that many samples. Pass
+    HOP_LENGTH for windows read off a FrameFeatureCache: every start then
+    falls on the recording's STFT frame grid.
+    """
+    hop = max(align, int(round(hop_s * sr / align)) * align)
+    min_len = int(min_s * sr)
+    bounds = []
+    for length_s in lengths_s:
+        length = int(round(length_s * sr))
+        for start in range(0, n_samples, hop):
+            end = min(start + length, n_samples)
+            if end - start > min_len:
+                bounds.append((start, end))
+            if end == n_samples:
+                break
+    return bounds
+
+
+class FrameFeatureCache:
+    """Frame-level features of one recording, for many windows of it.
+
+    Built once per recording (one STFT over the whole signal). After
+    that, `window_features` returns the 17-dim vector of any [start, end)
+    sample range, equal to extract_features on the sliced clip up to
+    float rounding:
+
+    - A standalone STFT of the clip has 1 + len // HOP_LENGTH frames
+      centred on start + k * HOP_LENGTH. If `start` is on the recording's
+      frame grid (window_bounds(..., align=HOP_LENGTH)), every frame that
+      doesn't reach past the clip's edges *is* a recording frame.
+    - The few frames that do (PAD_FRAMES at the start, up to one more at
+      the end) see zero padding instead of neighbouring audio. They are
+      recomputed per window, batched: one small multichannel STFT for all
+      heads and one per window length for all tails.
+    - Centroid, rolloff, ZCR and pitch are per-frame values: running sums
+      over the shared frames plus the recomputed edge frames.
+    - MFCC is a DCT of the mean log-mel frame (the DCT is linear), with
+      the log-mel floored at TOP_DB below the *window's* loudest bin, so
+      the floor is applied to the window's own frames. That is O(frames)
+      per window but no FFTs.
+
+    Windows off the frame grid or shorter than 2 * N_FFT samples go
+    through extract_features itself.
+
+    Memory is ~4 bytes per frame and mel band: ~13 MB for 10 minutes.
+    """
+
+    PAD_FRAMES = N_FFT // 2 // HOP_LENGTH     # frames that reach past the start
+
+    def __init__(self, y: np.ndarray, sr: int):
+        y = _as_float(y)
+        self.y = y
+        self.sr = sr
+        self.dtype = y.dtype
+        mel, centroid, rolloff, zcr, pitches = _frame_arrays(y, sr)
+        self.n_frames = mel.shape[1]
+
+        # float64 running sums: a 10 min recording is ~19k frames, enough
+        # for float32 cancellation to show in (C[f1] - C[f0]).
+        other = np.vstack([centroid, rolloff, zcr]).T                 # (n_frames, 3)
+        self._other = self._prefix(other.astype(np.float64))
+        self._pitch_sum = self._prefix(pitches.sum(axis=0, dtype=np.float64))
+        self._pitch_count = self._prefix(np.count_nonzero(pitches, axis=0))
+        self._log_mel = librosa.power_to_db(mel, top_db=None).T      # (n_frames, n_mels)
+
+    @staticmethod
+    def _prefix(a: np.ndarray) -> np.ndarray:
+        out = np.zeros((len(a) + 1,) + a.shape[1:], dtype=np.result_type(a.dtype, np.float32))
+        np.cumsum(a, axis=0, out=out[1:])
+        return out
+
+    def _edge_frames(self, snippets: np.ndarray, frames: slice):
+        """Per-window sums over `frames` of a batch of standalone snippets.
+
+        Returns (log_mel (n, n_frames, n_mels), other (n, 3), pitch_sum (n,),
+        pitch_count (n,)).
+        """
+        mel, centroid, rolloff, zcr, pitches = _frame_arrays(snippets, self.sr)
+        log_mel = librosa.power_to_db(mel[..., frames], top_db=None).transpose(0, 2, 1)
+        other = np.concatenate([centroid, rolloff, zcr], axis=1)[..., frames]
+        pitches = pitches[..., frames]
+        return (log_mel, other.sum(axis=2, dtype=np.float64),
+                pitches.sum(axis=(1, 2), dtype=np.float64),
+                np.count_nonzero(pitches, axis=(1, 2)))
+
+    def _aligned_features(self, starts: np.ndarray, length: int) -> np.ndarray:
+        """Feature rows for windows [start, start + length), starts on the grid."""
+        pad = self.PAD_FRAMES
+        n_frames = 1 + length // HOP_LENGTH
+        tail = (length - N_FFT // 2) // HOP_LENGTH + 1    # first frame past the end
+        # Tail snippet: on the grid, >= N_FFT long, and starting at least
+        # `pad` frames before `tail` so its own left padding doesn't reach.
+        tail_from = min((length - N_FFT) // HOP_LENGTH, tail - pad) * HOP_LENGTH
+
+        heads = self._edge_frames(
+            np.stack([self.y[s:s + N_FFT] for s in starts]), slice(0, pad))
+        tails = self._edge_frames(
+            np.stack([self.y[s + tail_from:s + length] for s in starts]),
+            slice(tail - tail_from // HOP_LENGTH, None))
+
+        f0 = starts // HOP_LENGTH + pad
+        f1 = starts // HOP_LENGTH + tail
+        other = (self._other[f1] - self._other[f0] + heads[1] + tails[1]) / n_frames
+        pitch_sum = self._pitch_sum[f1] - self._pitch_sum[f0] + heads[2] + tails[2]
+        count = self._pitch_count[f1] - self._pitch_count[f0] + heads[3] + tails[3]
+        pitch = np.where(count > 0, pitch_sum / np.maximum(count, 1), 0.0)
+
+        log_mel = np.empty((len(starts), self._log_mel.shape[1]))
+        for i, (a, b) in enumerate(zip(f0, f1)):
+            parts = (heads[0][i], self._log_mel[a:b], tails[0][i])
+            floor = max(part.max() for part in parts) - TOP_DB
+            log_mel[i] = sum(np.maximum(part, floor).sum(axis=0, dtype=np.float64)
+                             for part in parts)
+        mfccs = dct(log_mel / n_frames, type=2, norm="ortho", axis=1)[:, :N_MFCC]
+        return np.column_stack([mfccs, other, pitch])
+
+    def window_features(self, bounds: Sequence[Tuple[int, int]]) -> np.ndarray:
+        """(n_windows, 17) feature matrix for [start, end) sample ranges."""
+        out = np.empty((len(bounds), len(FEATURE_COLUMNS)), dtype=self.dtype)
+        by_length = {}
+        for i, (start, end) in enumerate(bounds):
+            if start % HOP_LENGTH or end - start < 2 * N_FFT:
+                out[i] = extract_features(self.y[start:end], self.sr)
+            else:
+                by_length.setdefault(end - start, []).append(i)
+        for length, rows in by_length.items():
+            starts = np.array([bounds[i][0] for i in rows])
+            out[rows] = self._aligned_features(starts, length)
+        return out
@@ -0,0 +1,280 @@
+"""
+job_queue.py
+============
+
+Durable local job queue on SQLite, for long recordings that shouldn't be
+processed inside an HTTP request.
+
+- One row per job in `jobs`. Status goes queued → running → done | failed.
+- Workers claim a job with a *lease* (BEGIN IMMEDIATE, so two workers —
+  threads or processes — never claim the same row). A worker that crashes
+  simply stops renewing its lease; once it expires the job is claimable
+  again. That's the whole crash-recovery story, no startup sweep needed.
+- Every claim gets a fresh lease token. heartbeat / checkpoint / complete /
+  fail only touch the job while that token is still current, so a worker
+  whose lease expired can't overwrite the work of the one that reclaimed it.
+- Failures are retried with exponential backoff up to MAX_ATTEMPTS.
+- `job_clips` holds per-clip checkpoints. A retried job skips every clip
+  already classified with the same model version.
+- `purge()` deletes done / failed jobs older than a retention period (rows
+  and checkpoints); the caller removes their files.
+
+The DB lives next to the job input files in JOB_DIR (default ./jobs).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import time
+import uuid
+from typing import List, NamedTuple, Optional
+
+
+# =============================================================================
+# CONFIG
+# =============================================================================
+
+JOB_DIR = os.environ.get("JOB_DIR", "jobs")
+LEASE_S = 120            # a claim lasts this long unless renewed (heartbeat)
+MAX_ATTEMPTS = 3         # then the job is marked failed
+RETRY_BASE_S = 5         # backoff: 5 s, 10 s, 20 s, ...
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,
+    filename    TEXT,
+    batch       TEXT,
+    lease_token TEXT,
+    input_path  TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL,
+    not_before  REAL NOT NULL DEFAULT 0,
+    lease_until REAL NOT NULL DEFAULT 0,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    result      TEXT,
+    error       TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, not_before, created_at);
+CREATE TABLE IF NOT EXISTS job_clips (
+    job_id        TEXT NOT NULL,
+    idx           INTEGER NOT NULL,
+    model_version TEXT NOT NULL,
+    prediction    TEXT NOT NULL,
+    confidence    REAL NOT NULL,
+    PRIMARY KEY (job_id, idx, model_version)
+);
+"""
+
+class Job(NamedTuple):
+    id: str
+    status: str
+    filename: Optional[str]
+    batch: Optional[str]
+    input_path: str
+    created_at: float
+    updated_at: float
+    attempts: int
+    result: Optional[dict]
+    error: Optional[str]
+    lease_token: Optional[str]
+
+
+# =============================================================================
+# QUEUE
+# =============================================================================
+
+class JobQueue:
+    """Thin wrapper over one SQLite file. Safe to share across threads:
+    every call opens its own short-lived connection."""
+
+    def __init__(self, job_dir: str = JOB_DIR):
+        self.job_dir = job_dir
+        os.makedirs(job_dir, exist_ok=True)
+        self.db_path = os.path.join(job_dir, "jobs.sqlite3")
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        return _Closing(db)
+
+    @staticmethod
+    def _job(row) -> Optional[Job]:
+        if row is None:
+            return None
+        return Job(
+            id=row["id"],
+            status=row["status"],
+            filename=row["filename"],
+            batch=row["batch"],
+            input_path=row["input_path"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            attempts=row["attempts"],
+            result=json.loads(row["result"]) if row["result"] else None,
+            error=row["error"],
+            lease_token=row["lease_token"],
+        )
+
+    def new_input_path(self, suffix: str = "") -> tuple:
+        """Reserve a job id and the path its input file should be written to."""
+        job_id = uuid.uuid4().hex
+        return job_id, os.path.join(self.job_dir, f"{job_id}{suffix}")
+
+    def enqueue(self, job_id: str, input_path: str, filename: Optional[str] = None,
+                batch: Optional[str] = None) -> Job:
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO jobs (id, status, filename, batch, input_path, created_at, updated_at)"
+                " VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, filename, batch, input_path, now, now),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._connect() as db:
+            return self._job(db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def claim(self) -> Optional[Job]:
+        """Take the oldest runnable job (queued, or running with a dead lease).
+
+        The returned Job carries the new lease token; pass it to every
+        later call for this job.
+        """
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                # A job that keeps killing its worker never reaches fail();
+                # stop reclaiming it once it has used up its attempts.
+                db.execute(
+                    "UPDATE jobs SET status = 'failed', lease_until = 0, lease_token = NULL,"
+                    " updated_at = ?,"
+                    " error = COALESCE(error, 'Worker lost (lease expired)')"
+                    " WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                    (now, now, MAX_ATTEMPTS),
+                )
+                row = db.execute(
+                    "SELECT * FROM jobs"
+                    " WHERE (status = 'queued' AND not_before <= ?)"
+                    "    OR (status = 'running' AND lease_until < ?)"
+                    " ORDER BY created_at LIMIT 1",
+                    (now, now),
+                ).fetchone()
+                if row is not None:
+                    db.execute(
+                        "UPDATE jobs SET status = 'running', attempts = attempts + 1,"
+                        " lease_until = ?, lease_token = ?, updated_at = ? WHERE id = ?",
+                        (now + LEASE_S, uuid.uuid4().hex, now, row["id"]),
+                    )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return self.get(row["id"]) if row is not None else None
+
+    def heartbeat(self, job_id: str, token: str) -> bool:
+        """Extend the lease; call between units of work. False if the lease
+        was lost (expired and reclaimed, or the job was finished)."""
+        now = time.time()
+        with self._connect() as db:
+            cur = db.execute(
+                "UPDATE jobs SET lease_until = ?, updated_at = ?"
+                " WHERE id = ? AND lease_token = ? AND status = 'running'",
+                (now + LEASE_S, now, job_id, token),
+            )
+        return cur.rowcount == 1
+
+    def checkpoint(self, job_id: str, token: str, idx: int, model_version: str,
+                   prediction: str, confidence: float) -> bool:
+        """Record one classified clip and renew the lease in the same breath."""
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO job_clips VALUES (?, ?, ?, ?, ?)",
+                (job_id, idx, model_version, prediction, confidence),
+            )
+        return self.heartbeat(job_id, token)
+
+    def checkpoints(self, job_id: str, model_version: str) -> dict:
+        """{clip idx: (prediction, confidence)} already done with this model."""
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT idx, prediction, confidence FROM job_clips"
+                " WHERE job_id = ? AND model_version = ?",
+                (job_id, model_version),
+            ).fetchall()
+        return {r["idx"]: (r["prediction"], r["confidence"]) for r in rows}
+
+    def complete(self, job_id: str, token: str, result: dict) -> bool:
+        """Store the result. False (and nothing written) if the lease was lost."""
+        with self._connect() as db:
+            cur = db.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL,"
+                " lease_until = 0, lease_token = NULL, updated_at = ?"
+                " WHERE id = ? AND lease_token = ? AND status = 'running'",
+                (json.dumps(result), time.time(), job_id, token),
+            )
+        return cur.rowcount == 1
+
+    def fail(self, job_id: str, token: str, error: str, retry: bool = True) -> Optional[str]:
+        """Requeue with backoff, or mark failed. Returns the new status, or
+        None if the lease was lost (someone else owns the job now)."""
+        job = self.get(job_id)
+        now = time.time()
+        if retry and job is not None and job.attempts < MAX_ATTEMPTS:
+            status, not_before = "queued", now + RETRY_BASE_S * 2 ** (job.attempts - 1)
+        else:
+            status, not_before = "failed", 0
+        with self._connect() as db:
+            cur = db.execute(
+                "UPDATE jobs SET status = ?, error = ?, not_before = ?, lease_until = 0,"
+                " lease_token = NULL, updated_at = ?"
+                " WHERE id = ? AND lease_token = ? AND status = 'running'",
+                (status, error, not_before, now, job_id, token),
+            )
+        return status if cur.rowcount == 1 else None
+
+    def purge(self, older_than_s: float) -> List[Job]:
+        """Delete done / failed jobs last updated more than `older_than_s`
+        ago, with their checkpoints. Returns the deleted jobs so the caller
+        can remove their files."""
+        cutoff = time.time() - older_than_s
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = db.execute(
+                    "SELECT * FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+                    (cutoff,),
+                ).fetchall()
+                for row in rows:
+                    db.execute("DELETE FROM job_clips WHERE job_id = ?", (row["id"],))
+                    db.execute("DELETE FROM jobs WHERE id = ?", (row["id"],))
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return [self._job(row) for row in rows]
+
+    def known_ids(self) -> set:
+        """Ids of every job still in the queue (any status)."""
+        with self._connect() as db:
+            return {r["id"] for r in db.execute("SELECT id FROM jobs")}
+
+
+class _Closing:
+    """`with` support that closes the connection (sqlite3's own doesn't)."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self.db
+
+    def __exit__(self, *exc):
+        self.db.close()
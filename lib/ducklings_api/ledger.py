@@ -0,0 +1,331 @@
+"""
+ledger.py
+=========
+
+Server-side prediction ledger: every finished /predict or /jobs result is
+appended here, so dashboards can ask the service for totals instead of
+scanning Firestore collections client-side.
+
+Two tables in one SQLite file (LEDGER_DIR, default ./ledger):
+
+- `predictions` — one compact row per recording (time, day, batch, model
+  version, clip mode, final prediction, average confidence, clip counts).
+  Indexed by time, batch and model version. Append-only.
+- `rollups` — running totals keyed by (day | batch, model version,
+  prediction, confidence bin), updated in the same transaction as the
+  insert. /stats reads only these, so its cost depends on how many days
+  and batches there are, not on how many recordings. Counts from
+  sliding-window recordings go to the *_windows columns: a window overlaps
+  its neighbours, so they don't add up with 3 s clips.
+
+Inserts are idempotent on `request_id` (a job id for /jobs), so a job
+that gets recorded twice after a crash isn't counted twice.
+
+Days are calendar days at UTC + LEDGER_UTC_OFFSET_H, fixed at write time.
+
+Rebuild the rollups after changing the binning:
+    python ledger.py rebuild
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from typing import Optional
+
+
+# =============================================================================
+# CONFIG
+# =============================================================================
+
+LEDGER_DIR = os.environ.get("LEDGER_DIR", "ledger")
+UTC_OFFSET_H = float(os.environ.get("LEDGER_UTC_OFFSET_H", "0"))
+CONF_BIN = 5                 # confidence histogram bin width, in %
+MAX_BATCH_LEN = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id                 INTEGER PRIMARY KEY,
+    request_id         TEXT NOT NULL UNIQUE,
+    ts                 REAL NOT NULL,
+    day                TEXT NOT NULL,
+    batch              TEXT,
+    model_version      TEXT NOT NULL,
+    source             TEXT NOT NULL,
+    clip_mode          TEXT NOT NULL,
+    final_prediction   TEXT NOT NULL,
+    average_confidence REAL NOT NULL,
+    total_clips        INTEGER NOT NULL,
+    male_clips         INTEGER NOT NULL,
+    female_clips       INTEGER NOT NULL,
+    skipped_clips      INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS predictions_ts ON predictions (ts);
+CREATE INDEX IF NOT EXISTS predictions_batch ON predictions (batch, ts);
+CREATE INDEX IF NOT EXISTS predictions_model ON predictions (model_version, ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    kind          TEXT NOT NULL,
+    key           TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    prediction    TEXT NOT NULL,
+    conf_bin      INTEGER NOT NULL,
+    recordings    INTEGER NOT NULL DEFAULT 0,
+    male_clips    INTEGER NOT NULL DEFAULT 0,
+    female_clips  INTEGER NOT NULL DEFAULT 0,
+    skipped_clips INTEGER NOT NULL DEFAULT 0,
+    male_windows    INTEGER NOT NULL DEFAULT 0,
+    female_windows  INTEGER NOT NULL DEFAULT 0,
+    skipped_windows INTEGER NOT NULL DEFAULT 0,
+    conf_sum      REAL NOT NULL DEFAULT 0,
+    first_ts      REAL NOT NULL,
+    last_ts       REAL NOT NULL,
+    PRIMARY KEY (kind, key, model_version, prediction, conf_bin)
+) WITHOUT ROWID;
+"""
+
+_ROLLUP_UPSERT = """
+INSERT INTO rollups (kind, key, model_version, prediction, conf_bin, recordings,
+                     male_clips, female_clips, skipped_clips,
+                     male_windows, female_windows, skipped_windows,
+                     conf_sum, first_ts, last_ts)
+VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (kind, key, model_version, prediction, conf_bin) DO UPDATE SET
+    recordings    = recordings + 1,
+    male_clips    = male_clips + excluded.male_clips,
+    female_clips  = female_clips + excluded.female_clips,
+    skipped_clips = skipped_clips + excluded.skipped_clips,
+    male_windows    = male_windows + excluded.male_windows,
+    female_windows  = female_windows + excluded.female_windows,
+    skipped_windows = skipped_windows + excluded.skipped_windows,
+    conf_sum      = conf_sum + excluded.conf_sum,
+    first_ts      = MIN(first_ts, excluded.first_ts),
+    last_ts       = MAX(last_ts, excluded.last_ts)
+"""
+
+
+# =============================================================================
+# INTERNAL HELPERS
+# =============================================================================
+
+def day_of(ts: float) -> str:
+    """Ledger day (YYYY-MM-DD) of a timestamp."""
+    return time.strftime("%Y-%m-%d", time.gmtime(ts + UTC_OFFSET_H * 3600))
+
+
+def _conf_bin(confidence: float) -> int:
+    return min(int(confidence // CONF_BIN) * CONF_BIN, 100 - CONF_BIN)
+
+
+def _bump_rollups(db, row) -> None:
+    """Add one predictions row to its day and batch rollups."""
+    keys = [("day", row["day"])]
+    if row["batch"]:
+        keys.append(("batch", row["batch"]))
+    counts = (row["male_clips"], row["female_clips"], row["skipped_clips"])
+    clips, windows = ((0, 0, 0), counts) if row["clip_mode"] == "sliding" else (counts, (0, 0, 0))
+    for kind, key in keys:
+        db.execute(_ROLLUP_UPSERT, (
+            kind, key, row["model_version"], row["final_prediction"],
+            _conf_bin(row["average_confidence"]),
+            *clips, *windows,
+            row["average_confidence"], row["ts"], row["ts"],
+        ))
+
+
+def _empty_group(key: str) -> dict:
+    return {
+        "key": key,
+        "recordings": 0,
+        "male": 0,
+        "female": 0,
+        "unknown": 0,
+        "male_clips": 0,
+        "female_clips": 0,
+        "skipped_clips": 0,
+        "male_windows": 0,
+        "female_windows": 0,
+        "skipped_windows": 0,
+        "_conf_sum": 0.0,
+        "confidence_histogram": {},
+        "model_versions": set(),
+        "first_ts": None,
+        "last_ts": None,
+    }
+
+
+def _finish_group(g: dict) -> dict:
+    sexed = g["male"] + g["female"]
+    g["male_ratio"] = round(g["male"] / sexed, 4) if sexed else None
+    g["average_confidence"] = round(g.pop("_conf_sum") / g["recordings"], 2) if g["recordings"] else None
+    g["confidence_histogram"] = {
+        f"{b}-{b + CONF_BIN}": n for b, n in sorted(g["confidence_histogram"].items())
+    }
+    g["model_versions"] = sorted(g["model_versions"])
+    return g
+
+
+class _Closing:
+    """`with` support that closes the connection (sqlite3's own doesn't)."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self.db
+
+    def __exit__(self, *exc):
+        self.db.close()
+
+
+# =============================================================================
+# LEDGER
+# =============================================================================
+
+class Ledger:
+    """Append-only prediction log + rollups in one SQLite file. Safe to
+    share across threads: every call opens its own short-lived connection."""
+
+    def __init__(self, ledger_dir: str = LEDGER_DIR):
+        os.makedirs(ledger_dir, exist_ok=True)
+        self.db_path = os.path.join(ledger_dir, "predictions.sqlite3")
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        return _Closing(db)
+
+    def record(self, request_id: str, summary: dict, model_version: str,
+               source: str = "predict", batch: Optional[str] = None,
+               ts: Optional[float] = None) -> bool:
+        """Append one result (the build_summary dict). False if `request_id`
+        was already recorded."""
+        ts = time.time() if ts is None else ts
+        row = {
+            "request_id": request_id,
+            "ts": ts,
+            "day": day_of(ts),
+            "batch": batch or None,
+            "model_version": model_version,
+            "source": source,
+            "clip_mode": summary.get("clip_mode", "split"),
+            "final_prediction": summary["final_prediction"],
+            "average_confidence": float(summary["average_confidence"]),
+            "total_clips": int(summary["total_clips"]),
+            "male_clips": int(summary["male_clips"]),
+            "female_clips": int(summary["female_clips"]),
+            "skipped_clips": int(summary.get("skipped_clips", 0)),
+        }
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                cur = db.execute(
+                    f"INSERT OR IGNORE INTO predictions ({', '.join(row)})"
+                    f" VALUES ({', '.join('?' * len(row))})",
+                    tuple(row.values()),
+                )
+                inserted = cur.rowcount == 1
+                if inserted:
+                    _bump_rollups(db, row)
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return inserted
+
+    def stats(self, kind: str, since: Optional[str] = None, until: Optional[str] = None,
+              keys: Optional[list] = None, model_version: Optional[str] = None,
+              limit: Optional[int] = None) -> list:
+        """Per-day or per-batch totals from the rollups.
+
+        `since`/`until` bound the key (inclusive; ISO dates compare as
+        strings). `keys` picks specific days/batches. `limit` keeps the
+        most recently active groups. Newest first.
+        """
+        if kind not in ("day", "batch"):
+            raise ValueError(f"Unknown stats kind: {kind!r}")
+        where, args = ["kind = ?"], [kind]
+        if since:
+            where.append("key >= ?")
+            args.append(since)
+        if until:
+            where.append("key <= ?")
+            args.append(until)
+        if keys:
+            where.append(f"key IN ({', '.join('?' * len(keys))})")
+            args.extend(keys)
+        if model_version:
+            where.append("model_version = ?")
+            args.append(model_version)
+        with self._connect() as db:
+            rows = db.execute(
+                f"SELECT * FROM rollups WHERE {' AND '.join(where)}", args
+            ).fetchall()
+
+        groups = {}
+        for r in rows:
+            g = groups.setdefault(r["key"], _empty_group(r["key"]))
+            n = r["recordings"]
+            g["recordings"] += n
+            pred = r["prediction"].lower()
+            g[pred if pred in ("male", "female") else "unknown"] += n
+            g["male_clips"] += r["male_clips"]
+            g["female_clips"] += r["female_clips"]
+            g["skipped_clips"] += r["skipped_clips"]
+            g["male_windows"] += r["male_windows"]
+            g["female_windows"] += r["female_windows"]
+            g["skipped_windows"] += r["skipped_windows"]
+            g["_conf_sum"] += r["conf_sum"]
+            g["confidence_histogram"][r["conf_bin"]] = g["confidence_histogram"].get(r["conf_bin"], 0) + n
+            g["model_versions"].add(r["model_version"])
+            g["first_ts"] = r["first_ts"] if g["first_ts"] is None else min(g["first_ts"], r["first_ts"])
+            g["last_ts"] = r["last_ts"] if g["last_ts"] is None else max(g["last_ts"], r["last_ts"])
+
+        order = "key" if kind == "day" else "last_ts"
+        out = sorted(groups.values(), key=lambda g: g[order], reverse=True)
+        if limit is not None:
+            out = out[:limit]
+        return [_finish_group(g) for g in out]
+
+    def rebuild_rollups(self) -> int:
+        """Recompute every rollup from `predictions`. Returns rows replayed."""
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute("DELETE FROM rollups")
+                rows = db.execute("SELECT * FROM predictions").fetchall()
+                for row in rows:
+                    _bump_rollups(db, row)
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+
+# =============================================================================
+# CLI
+#   python ledger.py rebuild
+#   python ledger.py stats day|batch
+# =============================================================================
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Prediction ledger maintenance.")
+    parser.add_argument("--ledger-dir", default=LEDGER_DIR)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("rebuild")
+    p_stats = sub.add_parser("stats")
+    p_stats.add_argument("kind", choices=["day", "batch"])
+    args = parser.parse_args()
+
+    ledger = Ledger(args.ledger_dir)
+    if args.cmd == "rebuild":
+        print(f"✅ Rebuilt rollups from {ledger.rebuild_rollups()} predictions")
+    else:
+        print(json.dumps(ledger.stats(args.kind), indent=2))
@@ -0,0 +1,445 @@
+"""
+loadtest.py
+===========
+
+Local load generator for /predict. Replays a corpus of recordings against
+the Flask app (app.py) or the FastAPI app (try.py) on localhost and reports
+a throughput / latency curve, error rates and server-side stage timings.
+
+Corpus:
+    - every bundled .m4a / .mp3 / .ogg / .wav under this folder, together
+      --bundled-weight of the traffic (split evenly), and
+    - synthetic duckling-like recordings (frequency-swept 2.5–4.5 kHz peeps
+      over background noise) at the durations given by --mix, sharing the
+      rest in the --mix proportions.
+
+Before the first step every bundled file is sent once; files the server
+can't handle (e.g. m4a on a host without ffmpeg) are dropped, so they
+don't show up as errors and mark every step "saturated".
+
+Load model: open loop. Each step of the curve offers a fixed arrival rate
+(Poisson arrivals) for --step-seconds. Latency is measured from the
+*scheduled* send time, so a backed-up client still shows the queueing
+delay a real user would see instead of hiding it.
+
+Server-side stage timings come from the Server-Timing header that app.py
+sets on /predict (upload, clean_split, features, svm, encode). try.py
+doesn't set it, so those columns are just empty there.
+
+Examples:
+    # server already running (python app.py / uvicorn try:app --port 8000)
+    python loadtest.py --rates 0.5,1,2,4 --step-seconds 30
+
+    # start the server for the run, pinned to 2 cores, 30 s + 2 min clips
+    python loadtest.py --spawn "taskset -c 0,1 python app.py" --mix 30:0.7,120:0.3
+
+    # CI: fail if p50 latency regressed >20% against a stored baseline
+    python loadtest.py --json now.json --baseline baseline.json --max-regression 0.2
+
+Standard library + numpy only — nothing external to install or call.
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import io
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+import wave
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+# =============================================================================
+# CONFIG
+# =============================================================================
+
+DEFAULT_URL = "http://127.0.0.1:8000"
+AUDIO_EXTS = (".m4a", ".mp3", ".ogg", ".wav")
+SYNTH_SR = 16_000
+SATURATION_THROUGHPUT = 0.9   # achieved / offered below this → saturated
+SATURATION_ERROR_RATE = 0.01  # more than 1% errors → saturated
+PROBE_RETRIES = 5             # probe resends on 503 (busy / warming up)
+PROBE_RETRY_S = 2.0
+
+
+# =============================================================================
+# CORPUS
+# =============================================================================
+
+def _synthetic_wav(seconds: float, rng: np.random.Generator) -> bytes:
+    """Peeps: 80–150 ms upward sweeps at 2.5–4.5 kHz, random gaps, noise floor."""
+    n = int(seconds * SYNTH_SR)
+    y = rng.normal(0, 0.01, n)
+    t = 0.0
+    while t < seconds:
+        t += rng.uniform(0.1, 0.6)
+        dur = rng.uniform(0.08, 0.15)
+        start = int(t * SYNTH_SR)
+        m = min(int(dur * SYNTH_SR), n - start)
+        if m <= 0:
+            break
+        tt = np.arange(m) / SYNTH_SR
+        f0 = rng.uniform(2500, 4500)
+        phase = 2 * np.pi * (f0 * tt + 0.5 * rng.uniform(500, 1500) * tt ** 2)
+        y[start:start + m] += 0.5 * np.sin(phase) * np.hanning(m)
+        t += dur
+
+    pcm = (np.clip(y, -1, 1) * 32767).astype("<i2")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SYNTH_SR)
+        w.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+def _parse_mix(spec: str):
+    """'3:0.5,30:0.3' → [(3.0, 0.5), (30.0, 0.3)]"""
+    mix = []
+    for part in filter(None, spec.split(",")):
+        seconds, _, weight = part.partition(":")
+        mix.append((float(seconds), float(weight or 1)))
+    return mix
+
+
+def build_corpus(folder: str, mix, synth_per_bucket: int, seed: int):
+    """List of (name, filename, bytes, weight). Weights are relative within
+    the bundled and the synthetic group; see normalise_weights."""
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(folder, "**", "*"), recursive=True)):
+        if path.lower().endswith(AUDIO_EXTS):
+            with open(path, "rb") as f:
+                corpus.append((os.path.relpath(path, folder), os.path.basename(path), f.read(), 1.0))
+
+    rng = np.random.default_rng(seed)
+    for seconds, weight in mix:
+        for i in range(synth_per_bucket):
+            name = f"synthetic_{seconds:g}s_{i + 1}.wav"
+            # Spread the bucket's weight over its files.
+            corpus.append((name, name, _synthetic_wav(seconds, rng), weight / synth_per_bucket))
+    return corpus
+
+
+def _is_synthetic(entry) -> bool:
+    return entry[0].startswith("synthetic_")
+
+
+def normalise_weights(corpus, bundled_share: float):
+    """Scale weights so bundled files sum to `bundled_share` of the traffic
+    and the synthetic --mix to the rest (all of it if a group is empty)."""
+    groups = {True: [c for c in corpus if _is_synthetic(c)],
+              False: [c for c in corpus if not _is_synthetic(c)]}
+    if not groups[True]:
+        bundled_share = 1.0
+    elif not groups[False]:
+        bundled_share = 0.0
+    out = []
+    for synthetic, share in ((False, bundled_share), (True, 1.0 - bundled_share)):
+        total = sum(c[3] for c in groups[synthetic])
+        out += [(*c[:3], share * c[3] / total) for c in groups[synthetic] if total]
+    return out
+
+
+def _multipart(filename: str, data: bytes):
+    boundary = uuid.uuid4().hex
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    return head + data + tail, f"multipart/form-data; boundary={boundary}"
+
+
+# =============================================================================
+# LOAD GENERATION
+# =============================================================================
+
+def _parse_server_timing(header: str):
+    """'clean_split;dur=812.4, svm;dur=3.1' → {'clean_split': 812.4, 'svm': 3.1}"""
+    stages = {}
+    for part in filter(None, (p.strip() for p in (header or "").split(","))):
+        name, *params = part.split(";")
+        for p in params:
+            key, _, value = p.strip().partition("=")
+            if key == "dur":
+                try:
+                    stages[name.strip()] = float(value)
+                except ValueError:
+                    pass
+    return stages
+
+
+def _send(url: str, body: bytes, content_type: str, timeout: float):
+    """POST once. Returns (status, server_timing_dict); status 0 = no response."""
+    req = urllib.request.Request(url, data=body, method="POST",
+                                 headers={"Content-Type": content_type})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            return resp.status, _parse_server_timing(resp.headers.get("Server-Timing"))
+    except urllib.error.HTTPError as e:
+        e.read()
+        return e.code, {}
+    except Exception:
+        return 0, {}
+
+
+def probe_corpus(url, corpus, timeout):
+    """Send each bundled file once; drop those the server can't handle.
+
+    A 503 says nothing about the file (server busy or still warming up),
+    so it is retried, and kept if the server never gets past it.
+    """
+    kept = []
+    for entry in corpus:
+        if _is_synthetic(entry):
+            kept.append(entry)
+            continue
+        request = _multipart(entry[1], entry[2])
+        status, _ = _send(url, *request, timeout)
+        for _ in range(PROBE_RETRIES):
+            if status != 503:
+                break
+            time.sleep(PROBE_RETRY_S)
+            status, _ = _send(url, *request, timeout)
+        if status == 503:
+            print(f"⚠️ Keeping {entry[0]} unprobed: server still busy (503)")
+        if status in (200, 503):
+            kept.append(entry)
+        else:
+            print(f"⚠️ Dropping {entry[0]}: server returned {status or 'no response'}")
+    return kept
+
+
+def run_step(url, requests_, weights, rate, seconds, max_inflight, timeout, rng):
+    """Offer `rate` req/s for `seconds`. Returns the step summary dict."""
+    results = []
+    lock = threading.Lock()
+
+    def fire(scheduled, item):
+        body, content_type = item
+        status, stages = _send(url, body, content_type, timeout)
+        done = time.perf_counter()
+        with lock:
+            results.append((scheduled, done, status, stages))
+
+    start = time.perf_counter()
+    t = 0.0
+    with ThreadPoolExecutor(max_workers=max_inflight) as pool:
+        while True:
+            t += rng.expovariate(rate)
+            if t >= seconds:
+                break
+            delay = start + t - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            item = rng.choices(requests_, weights=weights)[0]
+            pool.submit(fire, start + t, item)
+    wall = time.perf_counter() - start
+
+    latencies = np.array([(d - s) * 1000 for s, d, status, _ in results if status == 200])
+    codes = Counter(status for _, _, status, _ in results)
+    errors = sum(n for code, n in codes.items() if code != 200)
+    stage_ms = defaultdict(list)
+    for _, _, status, stages in results:
+        for name, ms in stages.items():
+            stage_ms[name].append(ms)
+
+    def pct(q):
+        return round(float(np.percentile(latencies, q)), 1) if latencies.size else None
+
+    return {
+        "offered_rps": rate,
+        "sent": len(results),
+        "throughput_rps": round(len(latencies) / wall, 3),
+        "error_rate": round(errors / len(results), 4) if results else 0.0,
+        "status_codes": {str(k): v for k, v in sorted(codes.items())},
+        "p50_ms": pct(50),
+        "p90_ms": pct(90),
+        "p99_ms": pct(99),
+        "stages_mean_ms": {k: round(float(np.mean(v)), 1) for k, v in stage_ms.items()},
+    }
+
+
+def _saturated(step):
+    if not step["sent"]:
+        return False
+    return (step["error_rate"] > SATURATION_ERROR_RATE
+            or step["throughput_rps"] < SATURATION_THROUGHPUT * step["offered_rps"])
+
+
+# =============================================================================
+# SERVER LIFECYCLE (--spawn)
+# =============================================================================
+
+def _get_json(url: str):
+    """GET once. Returns (status, JSON body); status 0 = no response."""
+    try:
+        with urllib.request.urlopen(url, timeout=2) as resp:
+            return resp.status, json.loads(resp.read() or b"{}")
+    except urllib.error.HTTPError as e:
+        e.read()
+        return e.code, {}
+    except Exception:
+        return 0, {}
+
+
+def _wait_ready(base_url: str, timeout: float) -> None:
+    """Poll until the server says its model is loaded.
+
+    app.py (Flask) answers / and /status at once but says "ready" only
+    after warm-up. try.py (FastAPI) has no /status and loads its model at
+    import, so there any answer from / counts.
+    """
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status, data = _get_json(base_url + "/status")
+        if status == 200 and data.get("status") == "ready":
+            return
+        if status == 404 and _get_json(base_url + "/")[0] == 200:
+            return
+        time.sleep(0.5)
+    raise TimeoutError(f"Server at {base_url} not ready after {timeout:.0f}s")
+
+
+# =============================================================================
+# REPORTING
+# =============================================================================
+
+def print_report(steps):
+    stage_names = sorted({k for s in steps for k in s["stages_mean_ms"]})
+    head = f"{'offered':>8s} {'tput':>7s} {'err%':>6s} {'p50':>8s} {'p90':>8s} {'p99':>8s}"
+    print("\n" + head + "".join(f" {n[:11]:>11s}" for n in stage_names))
+    for s in steps:
+        row = (f"{s['offered_rps']:8.2f} {s['throughput_rps']:7.2f} {s['error_rate'] * 100:6.2f} "
+               f"{s['p50_ms'] or 0:8.0f} {s['p90_ms'] or 0:8.0f} {s['p99_ms'] or 0:8.0f}")
+        row += "".join(f" {s['stages_mean_ms'].get(n, 0):11.0f}" for n in stage_names)
+        print(row + ("  ← saturated" if _saturated(s) else ""))
+    print("(rates in req/s, times in ms; stage columns are server-side means)")
+
+
+def compare_baseline(steps, baseline_path, max_regression):
+    """Compare p50 per offered rate. Returns a list of regression messages."""
+    with open(baseline_path) as f:
+        baseline = {s["offered_rps"]: s for s in json.load(f)["steps"]}
+    problems = []
+    for s in steps:
+        b = baseline.get(s["offered_rps"])
+        if not b or not b.get("p50_ms") or s["p50_ms"] is None:
+            continue
+        change = s["p50_ms"] / b["p50_ms"] - 1
+        if change > max_regression:
+            problems.append(f"p50 @ {s['offered_rps']} rps: {b['p50_ms']:.0f} → {s['p50_ms']:.0f} ms "
+                            f"(+{change * 100:.0f}%)")
+        if s["error_rate"] > b["error_rate"] + SATURATION_ERROR_RATE:
+            problems.append(f"errors @ {s['offered_rps']} rps: {b['error_rate']:.2%} → {s['error_rate']:.2%}")
+    return problems
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Replay recordings against /predict.")
+    parser.add_argument("--url", default=DEFAULT_URL, help="server base URL")
+    parser.add_argument("--rates", default="0.25,0.5,1,2",
+                        help="comma-separated offered rates, req/s (one curve step each)")
+    parser.add_argument("--step-seconds", type=float, default=30)
+    parser.add_argument("--mix", default="3:0.4,30:0.4,120:0.2",
+                        help="synthetic durations seconds:weight (empty = bundled files only)")
+    parser.add_argument("--synth-per-bucket", type=int, default=2)
+    parser.add_argument("--no-bundled", action="store_true", help="synthetic corpus only")
+    parser.add_argument("--bundled-weight", type=float, default=0.2,
+                        help="share of traffic for the bundled files (rest follows --mix)")
+    parser.add_argument("--no-probe", action="store_true",
+                        help="keep bundled files the server fails on")
+    parser.add_argument("--corpus-dir", default=here)
+    parser.add_argument("--max-inflight", type=int, default=32)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stop-at-saturation", action="store_true")
+    parser.add_argument("--spawn", help="command that starts the server; killed at the end")
+    parser.add_argument("--ready-timeout", type=float, default=120)
+    parser.add_argument("--json", help="write results here")
+    parser.add_argument("--baseline", help="earlier --json output to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip("/")
+    corpus = build_corpus(args.corpus_dir, _parse_mix(args.mix), args.synth_per_bucket, args.seed)
+    if args.no_bundled:
+        corpus = [c for c in corpus if _is_synthetic(c)]
+    if not 0 <= args.bundled_weight <= 1:
+        sys.exit("❌ --bundled-weight must be between 0 and 1")
+
+    server = None
+    if args.spawn:
+        print(f"🚀 Starting server: {args.spawn}")
+        server = subprocess.Popen(shlex.split(args.spawn), cwd=os.getcwd())
+    try:
+        _wait_ready(base_url, args.ready_timeout if server else 10)
+        if not args.no_probe:
+            corpus = probe_corpus(base_url + "/predict", corpus, args.timeout)
+        corpus = normalise_weights(corpus, args.bundled_weight)
+        if not corpus:
+            sys.exit("❌ Empty corpus")
+        print(f"🎵 Corpus: {len(corpus)} recordings, "
+              f"{sum(len(c[2]) for c in corpus) / 1e6:.1f} MB, "
+              f"bundled share {sum(c[3] for c in corpus if not _is_synthetic(c)):.0%}")
+
+        requests_ = [_multipart(filename, data) for _, filename, data, _ in corpus]
+        weights = [w for *_, w in corpus]
+        rng = random.Random(args.seed)
+        steps = []
+        for rate in (float(r) for r in args.rates.split(",") if r):
+            print(f"📈 {rate:g} req/s for {args.step_seconds:g}s ...")
+            step = run_step(base_url + "/predict", requests_, weights, rate,
+                            args.step_seconds, args.max_inflight, args.timeout, rng)
+            steps.append(step)
+            if args.stop_at_saturation and _saturated(step):
+                break
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print_report(steps)
+    knee = next((s["offered_rps"] for s in steps if _saturated(s)), None)
+    print(f"\n🎯 Saturation: {'≥ ' + format(knee, 'g') + ' req/s' if knee else 'not reached'}"
+          f" (cores: {os.cpu_count()}, server may be pinned lower)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"url": base_url, "rates": args.rates, "mix": args.mix,
+                       "bundled_weight": args.bundled_weight,
+                       "corpus": [c[0] for c in corpus],
+                       "saturation_rps": knee, "steps": steps}, f, indent=2)
+
+    if args.baseline:
+        problems = compare_baseline(steps, args.baseline, args.max_regression)
+        for p in problems:
+            print(f"❌ Regression: {p}")
+        if problems:
+            sys.exit(1)
+        print("✅ No regression against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+model_store.py
+==============
+
+Versioned model artifacts with memory-mapped loading.
+
+Layout on disk (MODEL_DIR, default ./models):
+
+    models/
+        CURRENT                          ← one line: the active version name
+        20261019-153000/
+            duckling_svm_rbf_cleaned.pkl
+            duckling_scaler_cleaned.pkl
+        20261102-091500/
+            ...
+
+- `publish()` writes a new version directory and (optionally) flips CURRENT.
+  Both steps go through a temp name + os.replace, so a reader never sees a
+  half-written version or a half-written pointer.
+- `load_bundle()` loads a version with joblib's mmap_mode. The big arrays
+  (support vectors, dual coefficients) stay in the page cache and every
+  worker process that loads the same file shares one physical copy.
+- If MODEL_DIR has no CURRENT, we fall back to the flat *_cleaned.pkl files
+  in the working directory (the pre-versioning layout), version "unversioned".
+
+Publish from the command line:
+    python model_store.py publish duckling_svm_rbf_cleaned.pkl duckling_scaler_cleaned.pkl
+    python model_store.py list
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import Any, NamedTuple, Optional
+
+import joblib
+
+# Not used directly: compressed models pickle a svm_compress.ReducedSetSVM,
+# so the module must be importable wherever we load them.
+import svm_compress  # noqa: F401
+
+
+# =============================================================================
+# CONFIG
+# =============================================================================
+
+MODEL_DIR = os.environ.get("MODEL_DIR", "models")
+MODEL_FILE = "duckling_svm_rbf_cleaned.pkl"
+SCALER_FILE = "duckling_scaler_cleaned.pkl"
+CURRENT_FILE = "CURRENT"
+UNVERSIONED = "unversioned"
+
+# "c" = copy-on-write mapping. sklearn's libsvm wrapper refuses read-only
+# buffers, but it never writes to them either, so pages are never copied
+# and stay shared with the page cache (and with every other worker).
+MMAP_MODE = "c"
+
+_VERSION_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+
+
+class ModelBundle(NamedTuple):
+    """Model + scaler + version, swapped as one object so they never mix."""
+    model: Any
+    scaler: Any
+    version: str
+
+
+# =============================================================================
+# INTERNAL HELPERS
+# =============================================================================
+
+def _check_version(version: str) -> str:
+    """Version names become directory names — reject anything path-like."""
+    if not _VERSION_RE.match(version or "") or ".." in version:
+        raise ValueError(f"Invalid model version: {version!r}")
+    return version
+
+
+def _write_atomic(path: str, text: str) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp-")
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+# =============================================================================
+# PUBLIC API
+# =============================================================================
+
+def current_version(model_dir: str = MODEL_DIR) -> Optional[str]:
+    """Version named in CURRENT, or None if the store isn't set up."""
+    try:
+        with open(os.path.join(model_dir, CURRENT_FILE)) as f:
+            return _check_version(f.read().strip())
+    except FileNotFoundError:
+        return None
+
+
+def pointer_mtime(model_dir: str = MODEL_DIR) -> Optional[float]:
+    """mtime of CURRENT — cheap change detection for the file watcher."""
+    try:
+        return os.stat(os.path.join(model_dir, CURRENT_FILE)).st_mtime
+    except FileNotFoundError:
+        return None
+
+
+def list_versions(model_dir: str = MODEL_DIR) -> list:
+    """All published versions, oldest first."""
+    if not os.path.isdir(model_dir):
+        return []
+    return sorted(
+        d for d in os.listdir(model_dir)
+        if _VERSION_RE.match(d) and os.path.isfile(os.path.join(model_dir, d, MODEL_FILE))
+    )
+
+
+def load_bundle(version: Optional[str] = None, model_dir: str = MODEL_DIR) -> ModelBundle:
+    """Load a version (default: CURRENT) with the arrays memory-mapped."""
+    if version is None:
+        version = current_version(model_dir)
+
+    if version is None:
+        model_path, scaler_path = MODEL_FILE, SCALER_FILE
+        version = UNVERSIONED
+    else:
+        base = os.path.join(model_dir, _check_version(version))
+        model_path = os.path.join(base, MODEL_FILE)
+        scaler_path = os.path.join(base, SCALER_FILE)
+
+    model = joblib.load(model_path, mmap_mode=MMAP_MODE)
+    scaler = joblib.load(scaler_path, mmap_mode=MMAP_MODE)
+    return ModelBundle(model, scaler, version)
+
+
+def activate(version: str, model_dir: str = MODEL_DIR) -> None:
+    """Point CURRENT at an already-published version."""
+    _check_version(version)
+    if not os.path.isfile(os.path.join(model_dir, version, MODEL_FILE)):
+        raise FileNotFoundError(f"Model version not found: {version}")
+    _write_atomic(os.path.join(model_dir, CURRENT_FILE), version + "\n")
+
+
+def publish(model, scaler, version: Optional[str] = None,
+            model_dir: str = MODEL_DIR, make_current: bool = True) -> str:
+    """Write model + scaler as a new version. Returns the version name.
+
+    Dumps are uncompressed on purpose: compressed joblib files can't be
+    memory-mapped.
+    """
+    version = _check_version(version or time.strftime("%Y%m%d-%H%M%S"))
+    final = os.path.join(model_dir, version)
+    if os.path.exists(final):
+        raise FileExistsError(f"Model version already exists: {version}")
+
+    os.makedirs(model_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=model_dir, prefix=".tmp-")
+    try:
+        joblib.dump(model, os.path.join(staging, MODEL_FILE))
+        joblib.dump(scaler, os.path.join(staging, SCALER_FILE))
+        os.replace(staging, final)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if make_current:
+        activate(version, model_dir)
+    return version
+
+
+# =============================================================================
+# CLI
+#   python model_store.py publish <model.pkl> <scaler.pkl> [--version V] [--no-activate]
+#   python model_store.py activate <version>
+#   python model_store.py list
+# =============================================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage versioned duckling models.")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_pub = sub.add_parser("publish")
+    p_pub.add_argument("model")
+    p_pub.add_argument("scaler")
+    p_pub.add_argument("--version")
+    p_pub.add_argument("--no-activate", action="store_true")
+    p_act = sub.add_parser("activate")
+    p_act.add_argument("version")
+    sub.add_parser("list")
+    args = parser.parse_args()
+
+    if args.cmd == "publish":
+        v = publish(joblib.load(args.model), joblib.load(args.scaler), args.version,
+                    args.model_dir, make_current=not args.no_activate)
+        print(f"✅ Published {v}{' (active)' if not args.no_activate else ''}")
+    elif args.cmd == "activate":
+        activate(args.version, args.model_dir)
+        print(f"✅ Active version → {args.version}")
+    else:
+        active = current_version(args.model_dir)
+        for v in list_versions(args.model_dir):
+            print(f"{'*' if v == active else ' '} {v}")
@@ -0,0 +1,249 @@
+"""
+svm_compress.py
+===============
+
+Post-training compression of the RBF SVC, by reduced-set distillation.
+
+Scoring an RBF SVC costs one kernel evaluation per support vector, and an
+SVC trained on noisy duckling clips keeps a large share of the training
+set as SVs. We replace
+
+    f(x) = Σ_i α_i K(sv_i, x) + b          (n_SV terms)
+with
+    f̃(x) = Σ_j β_j K(z_j, x) + b̃          (k ≪ n_SV terms)
+
+- Centres z_j: k-means over the original support vectors (scaled space),
+  so they sit where the decision function actually has mass.
+- Weights β, b̃: ridge regression of the full model's decision values on
+  the training set, i.e. the small expansion is distilled from the big one,
+  not refit to the labels.
+- Probabilities: a fresh Platt sigmoid fitted on f̃ against the true
+  training labels. Like SVC(probability=True), the sigmoid sees
+  out-of-fold decision values (β refit with each fold held out), so it is
+  not calibrated on scores of points the expansion was fitted to.
+
+`compress_svm()` tries each budget (fraction of the original SV count),
+smallest first, and returns the first one whose validation accuracy is
+within `max_accuracy_drop` of the full model. The validation split must be
+held out from both the SVC and the final test split. The chosen budget
+(`report[-1]["budget"]`) can then be re-applied with `reduce_svm()` to an
+SVC refitted on all training rows; report that model on the test split
+with `holdout_report()`.
+
+ReducedSetSVM exposes `classes_`, `predict_proba`, `predict` and
+`decision_function`, so the service loads it in place of the SVC with no
+code change. Keep this module importable next to app.py — joblib needs it
+to unpickle the compressed model. Binary classifiers only (female/male).
+"""
+
+from __future__ import annotations
+
+import time
+
+import numpy as np
+from sklearn.cluster import KMeans
+from sklearn.linear_model import LogisticRegression, Ridge
+from sklearn.model_selection import StratifiedKFold
+
+
+# =============================================================================
+# CONFIG
+# =============================================================================
+
+SV_BUDGETS = (0.02, 0.05, 0.1, 0.2, 0.4)   # fractions of the original SV count
+MAX_ACCURACY_DROP = 0.01                   # 1 percentage point on validation
+RIDGE_ALPHA = 1e-3
+MIN_CENTRES = 4
+PLATT_FOLDS = 5                            # same as SVC(probability=True)
+
+
+# =============================================================================
+# MODEL
+# =============================================================================
+
+class ReducedSetSVM:
+    """Binary RBF kernel expansion with Platt-scaled probabilities."""
+
+    def __init__(self, centres, coef, intercept, gamma, classes, platt_coef, platt_intercept):
+        self.support_vectors_ = np.ascontiguousarray(centres, dtype=np.float64)
+        self.coef_ = np.ascontiguousarray(coef, dtype=np.float64)
+        self.intercept_ = float(intercept)
+        self.gamma = float(gamma)
+        self.classes_ = np.asarray(classes)
+        self.platt_coef_ = float(platt_coef)
+        self.platt_intercept_ = float(platt_intercept)
+        self._sv_sq = np.einsum("ij,ij->i", self.support_vectors_, self.support_vectors_)
+
+    def __setstate__(self, state):
+        # Recompute the cached norms instead of pickling them.
+        self.__dict__.update(state)
+        self._sv_sq = np.einsum("ij,ij->i", self.support_vectors_, self.support_vectors_)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_sv_sq", None)
+        return state
+
+    @property
+    def n_support_vectors(self):
+        return len(self.support_vectors_)
+
+    def _kernel(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        sq = np.einsum("ij,ij->i", X, X)[:, None] + self._sv_sq[None, :]
+        sq -= 2.0 * X @ self.support_vectors_.T
+        np.maximum(sq, 0.0, out=sq)
+        return np.exp(-self.gamma * sq, out=sq)
+
+    def decision_function(self, X):
+        """> 0 means classes_[1], same convention as sklearn's binary SVC."""
+        return self._kernel(X) @ self.coef_ + self.intercept_
+
+    def predict_proba(self, X):
+        z = self.platt_coef_ * self.decision_function(X) + self.platt_intercept_
+        p1 = 1.0 / (1.0 + np.exp(-z))
+        return np.column_stack([1.0 - p1, p1])
+
+    def predict(self, X):
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
+
+
+def _rbf_gamma(model):
+    """The numeric gamma an SVC actually used ('scale'/'auto' resolved)."""
+    return float(getattr(model, "_gamma", model.gamma))
+
+
+def _out_of_fold_decision(K, target, y_bin, random_state):
+    """f̃ on each training row from a β fitted without that row's fold.
+    None if there are too few rows of a class to make the folds."""
+    n_folds = min(PLATT_FOLDS, int(np.bincount(y_bin, minlength=2).min()))
+    if n_folds < 2:
+        return None
+    f = np.empty(len(target))
+    folds = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+    for fit_idx, held_idx in folds.split(K, y_bin):
+        ridge = Ridge(alpha=RIDGE_ALPHA).fit(K[fit_idx], target[fit_idx])
+        f[held_idx] = ridge.predict(K[held_idx])
+    return f
+
+
+def reduce_svm(model, X_train, y_train, n_centres, random_state=42):
+    """Distill a fitted binary RBF SVC into an `n_centres`-term expansion.
+
+    `X_train`, `y_train` are the rows the SVC was trained on, with their
+    true labels (used for the Platt sigmoid only).
+    """
+    if len(model.classes_) != 2 or model.kernel != "rbf":
+        raise ValueError("Reduced-set compression supports binary RBF SVC only")
+
+    X_train = np.asarray(X_train, dtype=np.float64)
+    y_bin = (np.asarray(y_train) == model.classes_[1]).astype(int)
+    gamma = _rbf_gamma(model)
+    target = model.decision_function(X_train)
+
+    n_centres = max(MIN_CENTRES, min(n_centres, len(model.support_vectors_)))
+    km = KMeans(n_clusters=n_centres, n_init=3, random_state=random_state)
+    centres = km.fit(model.support_vectors_).cluster_centers_
+
+    # Fit β on kernel features; centres are fixed, so this is linear.
+    probe = ReducedSetSVM(centres, np.zeros(n_centres), 0.0, gamma, model.classes_, 1.0, 0.0)
+    K = probe._kernel(X_train)
+    ridge = Ridge(alpha=RIDGE_ALPHA).fit(K, target)
+
+    reduced = ReducedSetSVM(centres, ridge.coef_, ridge.intercept_, gamma,
+                            model.classes_, 1.0, 0.0)
+    f = _out_of_fold_decision(K, target, y_bin, random_state)
+    if f is not None:
+        platt = LogisticRegression().fit(f.reshape(-1, 1), y_bin)
+        reduced.platt_coef_ = float(platt.coef_[0, 0])
+        reduced.platt_intercept_ = float(platt.intercept_[0])
+    return reduced
+
+
+# =============================================================================
+# EVALUATION
+# =============================================================================
+
+def _proba_accuracy(model, X, y):
+    """Accuracy of argmax(predict_proba) — what app.py actually reports."""
+    pred = model.classes_[np.argmax(model.predict_proba(X), axis=1)]
+    return float(np.mean(pred == np.asarray(y)))
+
+
+def scoring_latency_ms(model, X, repeats=3):
+    """Mean ms per single-row predict_proba call (the service scores one
+    clip at a time, so per-call latency is what matters)."""
+    X = np.asarray(X, dtype=np.float64)
+    rows = [X[i:i + 1] for i in range(min(len(X), 200))]
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        for r in rows:
+            model.predict_proba(r)
+        best = min(best, (time.perf_counter() - t0) / len(rows))
+    return best * 1000
+
+
+def compress_svm(model, X_train, y_train, X_val, y_val, budgets=SV_BUDGETS,
+                 max_accuracy_drop=MAX_ACCURACY_DROP, random_state=42):
+    """Smallest reduced model within the accuracy budget on (X_val, y_val).
+
+    The validation rows pick the budget, so they are spent: don't quote the
+    accuracy delta from this report, use `holdout_report()` on a test split.
+
+    Returns
+    -------
+    best : ReducedSetSVM | None   — None if no budget met the accuracy bar.
+    report : list[dict]           — one row per tried budget, plus the full
+                                     model as the first row. When `best` is
+                                     not None it is the last row.
+    """
+    X_val = np.asarray(X_val, dtype=np.float64)
+    n_sv = len(model.support_vectors_)
+    base_acc = _proba_accuracy(model, X_val, y_val)
+    report = [{
+        "model": "full",
+        "budget": 1.0,
+        "n_sv": n_sv,
+        "accuracy": base_acc,
+        "accuracy_delta": 0.0,
+        "latency_ms": scoring_latency_ms(model, X_val),
+    }]
+
+    best = None
+    for frac in sorted(budgets):
+        reduced = reduce_svm(model, X_train, y_train, int(round(frac * n_sv)), random_state)
+        acc = _proba_accuracy(reduced, X_val, y_val)
+        report.append({
+            "model": f"reduced {frac:.0%}",
+            "budget": frac,
+            "n_sv": reduced.n_support_vectors,
+            "accuracy": acc,
+            "accuracy_delta": acc - base_acc,
+            "latency_ms": scoring_latency_ms(reduced, X_val),
+        })
+        if base_acc - acc <= max_accuracy_drop:
+            best = reduced
+            break
+    return best, report
+
+
+def holdout_report(model, reduced, X_test, y_test):
+    """Full vs. chosen reduced model on a split neither was selected on,
+    in the same row format as compress_svm's report."""
+    X_test = np.asarray(X_test, dtype=np.float64)
+    base_acc = _proba_accuracy(model, X_test, y_test)
+    acc = _proba_accuracy(reduced, X_test, y_test)
+    return [
+        {"model": "full", "n_sv": len(model.support_vectors_), "accuracy": base_acc,
+         "accuracy_delta": 0.0, "latency_ms": scoring_latency_ms(model, X_test)},
+        {"model": "reduced", "n_sv": reduced.n_support_vectors, "accuracy": acc,
+         "accuracy_delta": acc - base_acc, "latency_ms": scoring_latency_ms(reduced, X_test)},
+    ]
+
+
+def print_report(report):
+    print(f"{'model':>14s} {'SVs':>6s} {'accuracy':>9s} {'delta':>7s} {'ms/clip':>8s}")
+    for r in report:
+        print(f"{r['model']:>14s} {r['n_sv']:6d} {r['accuracy'] * 100:8.2f}% "
+              f"{r['accuracy_delta'] * 100:+6.2f} {r['latency_ms']:8.3f}")
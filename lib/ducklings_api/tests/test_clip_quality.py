@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from audio_clean import TARGET_SR, clean_audio, to_wav_bytes
+from clip_quality import FRAME, MAX_FLATNESS, gate, score_clips
+
+SR = TARGET_SR
+
+
+def cleaned(y):
+    """Run a synthetic recording through the real cleaning chain."""
+    y, sr = clean_audio(to_wav_bytes(y.astype(np.float32), SR))
+    assert sr == SR
+    return y
+
+
+@pytest.fixture(scope="module")
+def peeps():
+    rng = np.random.default_rng(0)
+    t = np.arange(3 * SR) / SR
+    f0 = 3000 + 800 * np.sin(2 * np.pi * 3 * t)
+    y = np.sin(2 * np.pi * np.cumsum(f0) / SR) * (np.sin(2 * np.pi * 4 * t) > 0)
+    return cleaned(0.5 * y + 0.01 * rng.standard_normal(len(t)))
+
+
+def test_cleaned_white_noise_is_noise_like():
+    rng = np.random.default_rng(1)
+    noise = cleaned(0.3 * rng.standard_normal(3 * SR))
+    [q] = score_clips([noise], SR)
+    assert q.flatness > MAX_FLATNESS
+    assert not q.keep and q.reason == "noise-like"
+
+
+def test_peeps_are_kept(peeps):
+    [q] = score_clips([peeps], SR)
+    assert q.keep and q.reason == ""
+    assert q.flatness < MAX_FLATNESS / 2
+    assert 0 < q.weight <= 1
+
+
+def test_silent_and_sparse_clips_are_skipped(peeps):
+    silent = np.zeros(3 * SR, dtype=np.float32)
+    sparse = np.zeros(3 * SR, dtype=np.float32)
+    sparse[:2 * FRAME] = peeps[:2 * FRAME]
+    reasons = [q.reason for q in score_clips([silent, sparse, peeps], SR)]
+    assert reasons == ["silent", "mostly silence", ""]
+
+
+def test_gate_keeps_best_clip_when_all_fail(peeps):
+    sparse = np.zeros(3 * SR, dtype=np.float32)
+    sparse[:2 * FRAME] = peeps[:2 * FRAME]
+    qualities = score_clips([np.zeros(3 * SR, dtype=np.float32), sparse], SR)
+    assert not any(q.keep for q in qualities)
+
+    kept = gate(qualities)
+    assert [q.keep for q in kept] == [False, True]
+    assert kept[1].weight == 1.0 and kept[1].reason == ""
+    # Untouched when something already passed.
+    mixed = score_clips([sparse, peeps], SR)
+    assert gate(mixed) == mixed
@@ -0,0 +1,74 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+
+from audio_clean import clean_audio
+from bench_float32 import reference_features
+from features import (
+    FEATURE_COLUMNS, FrameFeatureCache, HOP_LENGTH, extract_features, window_bounds,
+)
+
+SR = 22050
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES = sorted(glob.glob(os.path.join(HERE, "predicted_dataset", "*", "*.wav")))
+# float32 extract_features vs the old float64 clean + 16-bit WAV clip +
+# per-call librosa path, in units of each feature's std over the samples
+# (what the StandardScaler divides by). Measured worst: ~0.06 (ZCR).
+FLOAT32_TOLERANCE_STD = 0.1
+
+
+@pytest.fixture(scope="module")
+def signal():
+    """Peeps over noise, with a near-silent stretch so window dB floors
+    differ from the recording's."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(8 * SR)) / SR
+    f0 = 3000 + 800 * np.sin(2 * np.pi * 3 * t)
+    peeps = np.sin(2 * np.pi * np.cumsum(f0) / SR) * (np.sin(2 * np.pi * 4 * t) > 0)
+    y = 0.6 * peeps + 0.02 * rng.standard_normal(len(t))
+    y[int(3 * SR):int(4.5 * SR)] *= 1e-4
+    return y.astype(np.float32)
+
+
+def assert_matches(cache, y, bounds):
+    got = cache.window_features(bounds)
+    want = np.array([extract_features(y[s:e], SR) for s, e in bounds])
+    assert got.shape == want.shape and got.dtype == np.float32
+    np.testing.assert_allclose(got, want, rtol=1e-4, atol=1e-3)
+
+
+def test_window_features_match_extract_features(signal):
+    bounds = window_bounds(len(signal), SR, [1.5, 3.0], 0.5, align=HOP_LENGTH)
+    assert all(s % HOP_LENGTH == 0 for s, _ in bounds)
+    assert_matches(FrameFeatureCache(signal, SR), signal, bounds)
+
+
+def test_unaligned_and_short_windows_fall_back(signal):
+    bounds = [(1000, 1000 + 2 * SR), (HOP_LENGTH * 10, HOP_LENGTH * 10 + 2048)]
+    assert_matches(FrameFeatureCache(signal, SR), signal, bounds)
+
+
+def test_window_bounds_split_is_back_to_back():
+    n = int(10.5 * SR)
+    bounds = window_bounds(n, SR, [3.0], 3.0)
+    assert bounds == [(0, 3 * SR), (3 * SR, 6 * SR), (6 * SR, 9 * SR), (9 * SR, n)]
+    # A trailing window must be longer than min_s.
+    assert window_bounds(10 * SR, SR, [3.0], 3.0)[-1] == (6 * SR, 9 * SR)
+
+
+@pytest.mark.skipif(not SAMPLES, reason="bundled sample clips not found")
+def test_float32_features_match_old_path():
+    ref, new = [], []
+    for path in SAMPLES:
+        y64, sr = clean_audio(path, dtype=np.float64)
+        y32, _ = clean_audio(path, dtype=np.float32)
+        n = 3 * sr
+        for start in range(0, len(y64), n):
+            if len(y64[start:start + n]) > sr:
+                ref.append(reference_features(y64[start:start + n], sr))
+                new.append(extract_features(y32[start:start + n], sr))
+    ref, new = np.array(ref, dtype=np.float64), np.array(new, dtype=np.float64)
+    err = np.abs(new - ref) / np.maximum(ref.std(axis=0), 1e-6)
+    assert err.max() < FLOAT32_TOLERANCE_STD, dict(zip(FEATURE_COLUMNS, err.max(axis=0).round(3)))
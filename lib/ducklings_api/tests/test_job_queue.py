@@ -0,0 +1,131 @@
+import pytest
+
+import job_queue
+from job_queue import JobQueue, LEASE_S, MAX_ATTEMPTS, RETRY_BASE_S
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(job_queue.time, "time", c)
+    return c
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    return JobQueue(str(tmp_path))
+
+
+def enqueue(queue, n=1):
+    ids = []
+    for _ in range(n):
+        job_id, path = queue.new_input_path(".wav")
+        queue.enqueue(job_id, path)
+        ids.append(job_id)
+    return ids
+
+
+def test_claim_is_exclusive(queue):
+    (job_id,) = enqueue(queue)
+    job = queue.claim()
+    assert job.id == job_id and job.status == "running" and job.lease_token
+    assert queue.claim() is None
+
+
+def test_claims_hand_out_different_jobs(queue):
+    ids = enqueue(queue, 3)
+    claimed = [queue.claim().id for _ in ids]
+    assert sorted(claimed) == sorted(ids)
+    assert queue.claim() is None
+
+
+def test_expired_lease_is_reclaimed(queue, clock):
+    enqueue(queue)
+    first = queue.claim()
+    clock.now += LEASE_S - 1
+    assert queue.claim() is None
+
+    clock.now += 2
+    second = queue.claim()
+    assert second.id == first.id
+    assert second.attempts == 2
+    assert second.lease_token != first.lease_token
+
+
+def test_heartbeat_keeps_the_lease(queue, clock):
+    enqueue(queue)
+    job = queue.claim()
+    clock.now += LEASE_S - 1
+    assert queue.heartbeat(job.id, job.lease_token)
+    clock.now += LEASE_S - 1
+    assert queue.claim() is None
+
+
+def test_stale_token_is_rejected(queue, clock):
+    enqueue(queue)
+    old = queue.claim()
+    clock.now += LEASE_S + 1
+    new = queue.claim()
+
+    assert not queue.heartbeat(old.id, old.lease_token)
+    assert not queue.checkpoint(old.id, old.lease_token, 0, "v1", "Male", 90.0)
+    assert not queue.complete(old.id, old.lease_token, {"final_prediction": "Male"})
+    assert queue.fail(old.id, old.lease_token, "boom") is None
+    assert queue.get(new.id).status == "running"
+
+    assert queue.complete(new.id, new.lease_token, {"final_prediction": "Female"})
+    done = queue.get(new.id)
+    assert done.status == "done"
+    assert done.result == {"final_prediction": "Female"}
+
+
+def test_fail_retries_then_fails_after_max_attempts(queue, clock):
+    (job_id,) = enqueue(queue)
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        job = queue.claim()
+        assert job.id == job_id and job.attempts == attempt
+        status = queue.fail(job.id, job.lease_token, f"error {attempt}")
+        assert status == ("failed" if attempt == MAX_ATTEMPTS else "queued")
+        assert queue.claim() is None            # backing off
+        clock.now += RETRY_BASE_S * 2 ** (attempt - 1)
+
+    clock.now += 3600
+    assert queue.claim() is None
+    failed = queue.get(job_id)
+    assert failed.status == "failed"
+    assert failed.error == f"error {MAX_ATTEMPTS}"
+
+
+def test_worker_that_keeps_dying_ends_failed(queue, clock):
+    (job_id,) = enqueue(queue)
+    for _ in range(MAX_ATTEMPTS):
+        assert queue.claim().id == job_id
+        clock.now += LEASE_S + 1        # worker died without calling fail()
+    assert queue.claim() is None
+    assert queue.get(job_id).status == "failed"
+
+
+def test_purge_removes_only_old_finished_jobs(queue, clock):
+    done_id, running_id, queued_id = enqueue(queue, 3)
+    job = queue.claim()
+    assert job.id == done_id
+    queue.checkpoint(job.id, job.lease_token, 0, "v1", "Male", 90.0)
+    queue.complete(job.id, job.lease_token, {})
+    queue.claim()
+
+    assert queue.purge(3600) == []
+    clock.now += 3601
+    purged = queue.purge(3600)
+
+    assert [j.id for j in purged] == [done_id]
+    assert queue.get(done_id) is None
+    assert queue.checkpoints(done_id, "v1") == {}
+    assert queue.known_ids() == {running_id, queued_id}
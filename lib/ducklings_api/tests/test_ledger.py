@@ -0,0 +1,97 @@
+import calendar
+
+import pytest
+
+import ledger as ledger_mod
+from ledger import Ledger
+
+
+def noon(day):
+    """UTC noon of an ISO date, as a timestamp."""
+    return calendar.timegm(tuple(map(int, day.split("-"))) + (12, 0, 0))
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    monkeypatch.setattr(ledger_mod, "UTC_OFFSET_H", 0.0)
+    return Ledger(str(tmp_path))
+
+
+def summary(prediction="Male", confidence=80.0, male=3, female=1, skipped=0, clip_mode="split"):
+    return {
+        "final_prediction": prediction,
+        "average_confidence": confidence,
+        "total_clips": male + female + skipped,
+        "male_clips": male,
+        "female_clips": female,
+        "skipped_clips": skipped,
+        "clip_mode": clip_mode,
+    }
+
+
+def test_record_is_idempotent_on_request_id(ledger):
+    ts = noon("2026-10-01")
+    assert ledger.record("job-1", summary(), "v1", batch="b1", ts=ts)
+    assert not ledger.record("job-1", summary(prediction="Female"), "v1", batch="b1", ts=ts + 60)
+
+    [day] = ledger.stats("day")
+    [batch] = ledger.stats("batch")
+    for g in (day, batch):
+        assert g["recordings"] == 1 and g["male"] == 1 and g["female"] == 0
+        assert g["male_clips"] == 3 and g["female_clips"] == 1
+        assert g["last_ts"] == ts
+
+
+def test_split_and_sliding_counts_roll_up_separately(ledger):
+    ts = noon("2026-10-01")
+    ledger.record("a", summary(male=3, female=1, skipped=1), "v1", ts=ts)
+    ledger.record("b", summary(male=10, female=4, skipped=2, clip_mode="sliding"), "v1", ts=ts + 1)
+
+    [g] = ledger.stats("day")
+    assert g["recordings"] == 2 and g["male"] == 2
+    assert (g["male_clips"], g["female_clips"], g["skipped_clips"]) == (3, 1, 1)
+    assert (g["male_windows"], g["female_windows"], g["skipped_windows"]) == (10, 4, 2)
+
+    # Replaying the predictions table lands on the same split.
+    assert ledger.rebuild_rollups() == 2
+    assert ledger.stats("day") == [g]
+
+
+def test_stats_since_until_and_limit(ledger):
+    days = ["2026-10-01", "2026-10-02", "2026-10-03", "2026-10-04"]
+    for i, day in enumerate(days):
+        ledger.record(f"r{i}", summary(), "v1", ts=noon(day))
+
+    assert [g["key"] for g in ledger.stats("day")] == days[::-1]
+    assert [g["key"] for g in ledger.stats("day", since="2026-10-02", until="2026-10-03")] \
+        == ["2026-10-03", "2026-10-02"]
+    assert [g["key"] for g in ledger.stats("day", limit=2)] == ["2026-10-04", "2026-10-03"]
+    assert [g["key"] for g in ledger.stats("day", keys=["2026-10-01", "2026-10-09"])] == ["2026-10-01"]
+
+
+def test_batches_are_ordered_by_last_activity(ledger):
+    ledger.record("a", summary(), "v1", batch="old", ts=noon("2026-10-01"))
+    ledger.record("b", summary(), "v1", batch="new", ts=noon("2026-10-02"))
+    ledger.record("c", summary(), "v1", batch="old", ts=noon("2026-10-03"))
+
+    assert [g["key"] for g in ledger.stats("batch")] == ["old", "new"]
+    assert [g["key"] for g in ledger.stats("batch", limit=1)] == ["old"]
+
+
+def test_stats_model_version_filter_and_histogram(ledger):
+    ts = noon("2026-10-01")
+    ledger.record("a", summary(confidence=81.0), "v1", ts=ts)
+    ledger.record("b", summary(prediction="Female", confidence=100.0), "v2", ts=ts)
+
+    [both] = ledger.stats("day")
+    assert both["model_versions"] == ["v1", "v2"]
+    assert both["male_ratio"] == 0.5 and both["average_confidence"] == 90.5
+    assert both["confidence_histogram"] == {"80-85": 1, "95-100": 1}
+
+    [v2] = ledger.stats("day", model_version="v2")
+    assert v2["recordings"] == 1 and v2["female"] == 1
+
+
+def test_unknown_kind_is_rejected(ledger):
+    with pytest.raises(ValueError):
+        ledger.stats("week")
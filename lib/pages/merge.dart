@@ -486,11 +486,16 @@ class _GenderPredictorAppState extends State<GenderPredictorApp> {
         'total_clips': totalClips,
         'male_clips': maleClips,
         'female_clips': femaleClips,
-        'clip_results': clipResults.map((clip) => {
-          'clip': clip['clip'],
-          'prediction': clip['prediction'],
-          'confidence': clip['confidence'],
-        }).toList(),
+        // Quality-gated clips didn't vote; count them, don't list them.
+        'skipped_clips': clipResults.where((clip) => clip['skipped'] == true).length,
+        'clip_results': clipResults
+            .where((clip) => clip['skipped'] != true)
+            .map((clip) => {
+                  'clip': clip['clip'],
+                  'prediction': clip['prediction'],
+                  'confidence': clip['confidence'],
+                })
+            .toList(),
         'created_at': DateTime.now().toIso8601String(),
         'audio_path': audioFile.path,
       };
@@ -154,6 +154,7 @@ class _RecordPageState extends State<RecordPage> {
       "total_clips": ((decoded["total_clips"] ?? 0) as num).toInt(),
       "male_clips": ((decoded["male_clips"] ?? 0) as num).toInt(),
       "female_clips": ((decoded["female_clips"] ?? 0) as num).toInt(),
+      "skipped_clips": ((decoded["skipped_clips"] ?? 0) as num).toInt(),
       "prediction_summary": decoded["prediction_summary"] ?? [],
     };
 
@@ -236,11 +237,17 @@ class _RecordPageState extends State<RecordPage> {
       'total_clips': totalClips,
       'male_clips': maleClips,
       'female_clips': femaleClips,
-      'clip_results': clipResults.map((clip) => {
-            'clip': clip['clip'],
-            'prediction': clip['prediction'],
-            'confidence': clip['confidence'],
-          }).toList(),
+      // Quality-gated clips didn't vote; keep them out of clip_results so
+      // readers that split rows into male/female don't count them.
+      'skipped_clips': clipResults.where((clip) => clip['skipped'] == true).length,
+      'clip_results': clipResults
+          .where((clip) => clip['skipped'] != true)
+          .map((clip) => {
+                'clip': clip['clip'],
+                'prediction': clip['prediction'],
+                'confidence': clip['confidence'],
+              })
+          .toList(),
       'download_url': downloadUrl,
       'local_path': localPath,
       'created_at': FieldValue.serverTimestamp(),
@@ -279,6 +286,8 @@ class _RecordPageState extends State<RecordPage> {
         index: i + 1,
         gender: (c['prediction'] ?? 'unknown').toString(),
         confidence: ((c['confidence'] ?? 0.0) as num).toDouble(),
+        skipped: c['skipped'] == true,
+        reason: c['reason']?.toString(),
       ));
     }
 
@@ -32,14 +32,24 @@ class PredictionResult {
 
 class ClipPrediction {
   final int index;
-  final String gender;
+  final String gender; // "male" | "female" | "skipped"
   final double confidence;
+  // Dropped by the server's quality gate — it did not vote, so it is
+  // neither male nor female.
+  final bool skipped;
+  // Why it was dropped: "silent", "mostly silence" or "noise-like".
+  final String? reason;
 
   const ClipPrediction({
     required this.index,
     required this.gender,
     required this.confidence,
+    this.skipped = false,
+    this.reason,
   });
+
+  bool get isSkipped => skipped || gender.toLowerCase() == 'skipped';
+  bool get isFemale => !isSkipped && gender.toLowerCase() == 'female';
 }
 
 // ============================================================================
@@ -409,6 +419,12 @@ class _ClipBreakdown extends StatelessWidget {
   final List<ClipPrediction> clips;
   const _ClipBreakdown({required this.clips});
 
+  String _windowCountLabel() {
+    final skipped = clips.where((c) => c.isSkipped).length;
+    if (skipped == 0) return '${clips.length} windows';
+    return '${clips.length} windows · $skipped skipped';
+  }
+
   @override
   Widget build(BuildContext context) {
     return NeuBox(
@@ -422,7 +438,7 @@ class _ClipBreakdown extends StatelessWidget {
               Text('CLIP BREAKDOWN',
                   style: getCapsLabel(size: 10, opacity: 0.55)),
               Text(
-                '${clips.length} windows',
+                _windowCountLabel(),
                 style: GoogleFonts.quicksand(
                   fontSize: 11,
                   fontWeight: FontWeight.w500,
@@ -443,10 +459,20 @@ class _ClipRow extends StatelessWidget {
   final ClipPrediction clip;
   const _ClipRow({required this.clip});
 
+  String get _label {
+    if (clip.isSkipped) {
+      return clip.reason == null ? 'Skipped' : 'Skipped · ${clip.reason}';
+    }
+    return clip.isFemale ? 'Female' : 'Male';
+  }
+
   @override
   Widget build(BuildContext context) {
-    final isFemale = clip.gender.toLowerCase() == 'female';
-    final dotColor = isFemale ? secondColor : textcolor;
+    final dotColor = clip.isSkipped
+        ? textcolor.withValues(alpha: 0.25)
+        : clip.isFemale
+            ? secondColor
+            : textcolor;
 
     return Padding(
       padding: const EdgeInsets.symmetric(vertical: 5),
@@ -474,11 +500,14 @@ class _ClipRow extends StatelessWidget {
           ),
           Expanded(
             child: Text(
-              isFemale ? 'Female' : 'Male',
+              _label,
+              overflow: TextOverflow.ellipsis,
               style: GoogleFonts.quicksand(
                 fontSize: 13,
                 fontWeight: FontWeight.w500,
-                color: textcolor,
+                color: clip.isSkipped
+                    ? textcolor.withValues(alpha: 0.45)
+                    : textcolor,
               ),
             ),
           ),
@@ -508,7 +537,9 @@ class _ClipRow extends StatelessWidget {
           SizedBox(
             width: 38,
             child: Text(
-              '${(clip.confidence * 100).toStringAsFixed(0)}%',
+              clip.isSkipped
+                  ? '—'
+                  : '${(clip.confidence * 100).toStringAsFixed(0)}%',
               textAlign: TextAlign.right,
               style: GoogleFonts.quicksand(
                 fontSize: 11,
@@ -352,8 +352,9 @@ class ResultBottomSheet {
                                         final clipPrediction =
                                             clip['prediction'] ?? 'Unknown';
                                         final clipConfidence = clip['confidence'] ?? 0;
-                                        final clipColor =
-                                            clipPrediction.toLowerCase() == 'male'
+                                        final clipColor = clip['skipped'] == true
+                                            ? Colors.grey[600]
+                                            : clipPrediction.toLowerCase() == 'male'
                                                 ? Colors.blue[400]
                                                 : Colors.pink[400];
 
@@ -424,7 +425,9 @@ class ResultBottomSheet {
                                                         BorderRadius.circular(20),
                                                   ),
                                                   child: Text(
-                                                    '$clipConfidence%',
+                                                    clip['skipped'] == true
+                                                        ? '—'
+                                                        : '$clipConfidence%',
                                                     style: TextStyle(
                                                       color: clipColor,
                                                       fontSize: 14,
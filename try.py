@@ -80,7 +80,8 @@ async def predict_audio(file: UploadFile = File(...)):
 
     # Save uploaded temp file
     temp_input = tempfile.NamedTemporaryFile(delete=False, suffix=file.filename[-4:])
-    temp_input.write(await file.read())
+    # Stream to disk in chunks rather than reading the whole upload into RAM
+    shutil.copyfileobj(file.file, temp_input, 64 * 1024)
     temp_input.close()
 
     try: